@@ -5,6 +5,10 @@ import { z } from 'zod';
 import { getSupabaseServerAdminClient } from '@kit/supabase/server-admin-client';
 
 import { inngest } from '~/lib/inngest/client';
+import {
+  callbackUrlError,
+  callbacksConfigured,
+} from '~/lib/inngest/utils/report-callback';
 
 /**
  * Benchmark API - Unauthenticated endpoint for testing Sparlo vs Claude
@@ -21,6 +25,8 @@ const BenchmarkReportSchema = z.object({
     .string()
     .min(50, 'Please provide at least 50 characters')
     .max(10000, 'Design challenge must be under 10,000 characters'),
+  // Sent a signed POST of { reportId, status } when the report completes or fails
+  callbackUrl: z.string().url().optional(),
 });
 
 /**
@@ -72,6 +78,22 @@ export async function POST(request: Request) {
     return NextResponse.json({ error: 'Invalid JSON body' }, { status: 400 });
   }
 
+  if (body.callbackUrl) {
+    if (!callbacksConfigured()) {
+      return NextResponse.json(
+        {
+          error:
+            'Completion callbacks not configured. Set BENCHMARK_CALLBACK_SECRET env var.',
+        },
+        { status: 503 },
+      );
+    }
+    const urlError = await callbackUrlError(body.callbackUrl);
+    if (urlError) {
+      return NextResponse.json({ error: urlError }, { status: 400 });
+    }
+  }
+
   const client = getSupabaseServerAdminClient();
   const conversationId = crypto.randomUUID();
 
@@ -121,6 +143,7 @@ export async function POST(request: Request) {
         userId: BENCHMARK_ACCOUNT_ID,
         designChallenge: body.designChallenge,
         conversationId,
+        callbackUrl: body.callbackUrl,
       },
     });
   } catch (inngestError) {
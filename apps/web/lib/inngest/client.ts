@@ -67,6 +67,8 @@ export const HybridReportGenerateEventSchema = z.object({
   designChallenge: z.string().min(50),
   conversationId: z.string(),
   attachments: z.array(AttachmentSchema).optional(),
+  // Benchmark reports only (see utils/report-callback.ts)
+  callbackUrl: z.string().url().optional(),
 });
 
 export const HybridClarificationAnsweredEventSchema = z.object({
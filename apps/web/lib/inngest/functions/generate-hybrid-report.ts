@@ -41,6 +41,7 @@ import {
 import { HYBRID_CACHED_PREFIX } from '../../llm/prompts/hybrid/cached-prefix';
 import { inngest } from '../client';
 import { trackReportCompleted } from '../utils/analytics';
+import { notifyReportCallback } from '../utils/report-callback';
 import { handleReportFailure } from '../utils/report-failure-handler';
 
 /**
@@ -79,10 +80,13 @@ export const generateHybridReport = inngest.createFunction(
     ],
     onFailure: async ({ error, event, step }) => {
       const failureEvent = event as unknown as {
-        event: { data: { reportId: string } };
+        event: {
+          data: { reportId: string; accountId: string; callbackUrl?: string };
+        };
       };
-      const reportId = failureEvent.event.data.reportId;
+      const { reportId } = failureEvent.event.data;
       await handleReportFailure(reportId, error, step);
+      await notifyReportCallback(failureEvent.event.data, 'failed', step);
     },
   },
   { event: 'report/generate-hybrid' },
@@ -169,7 +173,13 @@ export const generateHybridReport = inngest.createFunction(
 
       // Handle ClaudeRefusalError at the top level
       try {
-        return await runHybridGeneration();
+        const result = await runHybridGeneration();
+        await notifyReportCallback(
+          event.data,
+          result.success ? 'complete' : 'error',
+          step,
+        );
+        return result;
       } catch (error) {
         if (error instanceof ClaudeRefusalError) {
           // P1 FIX: Use fresh client to avoid stale reference
@@ -183,6 +193,7 @@ export const generateHybridReport = inngest.createFunction(
             })
             .eq('id', reportId);
 
+          await notifyReportCallback(event.data, 'failed', step);
           return { success: false, reportId, error: error.message };
         }
         throw error;
@@ -0,0 +1,168 @@
+import 'server-only';
+
+import { createHmac } from 'node:crypto';
+import { lookup } from 'node:dns/promises';
+import { BlockList, isIP } from 'node:net';
+
+const CALLBACK_TIMEOUT_MS = 10_000;
+
+/**
+ * Completion callbacks are a benchmark-only feature: they are signed with
+ * BENCHMARK_CALLBACK_SECRET and only sent for reports owned by
+ * BENCHMARK_ACCOUNT_ID. BENCHMARK_CALLBACK_HOSTS optionally restricts the
+ * hosts a callback may be sent to (comma-separated).
+ */
+const BENCHMARK_ACCOUNT_ID = process.env.BENCHMARK_ACCOUNT_ID;
+const BENCHMARK_CALLBACK_SECRET = process.env.BENCHMARK_CALLBACK_SECRET;
+const BENCHMARK_CALLBACK_HOSTS = (process.env.BENCHMARK_CALLBACK_HOSTS ?? '')
+  .split(',')
+  .map((host) => host.trim().toLowerCase())
+  .filter(Boolean);
+
+// Loopback, private, link-local (incl. cloud metadata), CGNAT, multicast and reserved ranges
+const NON_PUBLIC_ADDRESSES = new BlockList();
+for (const [network, prefix] of [
+  ['0.0.0.0', 8],
+  ['10.0.0.0', 8],
+  ['100.64.0.0', 10],
+  ['127.0.0.0', 8],
+  ['169.254.0.0', 16],
+  ['172.16.0.0', 12],
+  ['192.0.0.0', 24],
+  ['192.168.0.0', 16],
+  ['198.18.0.0', 15],
+  ['224.0.0.0', 4],
+  ['240.0.0.0', 4],
+] as const) {
+  NON_PUBLIC_ADDRESSES.addSubnet(network, prefix, 'ipv4');
+}
+for (const [network, prefix] of [
+  ['::', 127],
+  ['::ffff:0:0', 96],
+  ['64:ff9b::', 96],
+  ['fc00::', 7],
+  ['fe80::', 10],
+  ['ff00::', 8],
+] as const) {
+  NON_PUBLIC_ADDRESSES.addSubnet(network, prefix, 'ipv6');
+}
+
+export type ReportCallbackTarget = {
+  reportId: string;
+  accountId: string;
+  callbackUrl?: string;
+};
+
+/**
+ * Whether completion callbacks can be sent at all (the signing secret is set).
+ */
+export function callbacksConfigured() {
+  return Boolean(BENCHMARK_CALLBACK_SECRET);
+}
+
+/**
+ * Check that a callback URL is http(s), allowed by BENCHMARK_CALLBACK_HOSTS
+ * and resolves only to public addresses. Returns an error message, or null
+ * if the URL may be called.
+ */
+export async function callbackUrlError(callbackUrl: string) {
+  let url: URL;
+  try {
+    url = new URL(callbackUrl);
+  } catch {
+    return 'callbackUrl is not a valid URL';
+  }
+
+  if (url.protocol !== 'http:' && url.protocol !== 'https:') {
+    return 'callbackUrl must be http(s)';
+  }
+
+  const host = url.hostname.replace(/^\[|\]$/g, '').toLowerCase();
+  if (
+    BENCHMARK_CALLBACK_HOSTS.length > 0 &&
+    !BENCHMARK_CALLBACK_HOSTS.includes(host)
+  ) {
+    return 'callbackUrl host is not in BENCHMARK_CALLBACK_HOSTS';
+  }
+
+  let addresses: { address: string; family: number }[];
+  try {
+    addresses = isIP(host)
+      ? [{ address: host, family: isIP(host) }]
+      : await lookup(host, { all: true });
+  } catch {
+    return 'callbackUrl host does not resolve';
+  }
+
+  const nonPublic = addresses.some(({ address, family }) =>
+    NON_PUBLIC_ADDRESSES.check(address, family === 6 ? 'ipv6' : 'ipv4'),
+  );
+  return nonPublic ? 'callbackUrl must resolve to a public address' : null;
+}
+
+/**
+ * Notify a benchmark report's callback URL that the report has finished.
+ * POSTs `{ reportId, status }`, signed with an HMAC-SHA256 of
+ * `<timestamp>.<body>` in `x-sparlo-signature` so the receiver can verify it.
+ *
+ * Best effort: a refused, unreachable or slow receiver is logged and never
+ * fails the report, since callers still poll the report as a fallback.
+ */
+export async function notifyReportCallback(
+  target: ReportCallbackTarget,
+  status: string,
+  step: { run: (name: string, fn: () => Promise<void>) => Promise<unknown> },
+) {
+  const { reportId, accountId, callbackUrl } = target;
+  if (
+    !callbackUrl ||
+    !BENCHMARK_CALLBACK_SECRET ||
+    !BENCHMARK_ACCOUNT_ID ||
+    accountId !== BENCHMARK_ACCOUNT_ID
+  ) {
+    return;
+  }
+
+  await step.run('notify-report-callback', async (): Promise<void> => {
+    // Checked again at send time: DNS may have changed since the report was created
+    const urlError = await callbackUrlError(callbackUrl);
+    if (urlError) {
+      console.warn('[Report Callback] Refused callback:', {
+        reportId,
+        error: urlError,
+      });
+      return;
+    }
+
+    const body = JSON.stringify({ reportId, status });
+    const timestamp = Math.floor(Date.now() / 1000).toString();
+    const signature = createHmac('sha256', BENCHMARK_CALLBACK_SECRET)
+      .update(`${timestamp}.${body}`)
+      .digest('hex');
+
+    try {
+      const response = await fetch(callbackUrl, {
+        method: 'POST',
+        headers: {
+          'content-type': 'application/json',
+          'x-sparlo-timestamp': timestamp,
+          'x-sparlo-signature': `sha256=${signature}`,
+        },
+        body,
+        redirect: 'error',
+        signal: AbortSignal.timeout(CALLBACK_TIMEOUT_MS),
+      });
+      if (!response.ok) {
+        console.warn('[Report Callback] Receiver rejected callback:', {
+          reportId,
+          status: response.status,
+        });
+      }
+    } catch (error) {
+      console.warn('[Report Callback] Failed to deliver callback:', {
+        reportId,
+        error: error instanceof Error ? error.message : String(error),
+      });
+    }
+  });
+}
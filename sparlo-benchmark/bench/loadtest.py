@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the benchmark CLI.
+
+Starts the stand-in Sparlo and Anthropic servers from mock_servers.py, then
+drives generate, batch, evaluate and import-reports at increasing problem
+counts, each in a fresh working directory. The Message Batches modes run too:
+batch-claude-batches is 'batch --claude-via-batches' and evaluate-async-batch
+is 'evaluate --async-batch' on its results. Every command runs as its own
+process, so its wall time, CPU time and peak memory are measured alone;
+requests are counted by the stand-ins, and the problems each command finished
+are counted in its results store.
+
+Mock reports finish in seconds, but batch still paces its polls for real
+25-minute reports, so its wall time mostly reflects poll intervals. Pass
+--batch-args "--webhook --webhook-port 0" to measure the callback path instead.
+
+    python bench/loadtest.py                       # 10, 100 and 1000 problems
+    python bench/loadtest.py --sizes 10,100 --report-seconds 3 --json loadtest.json
+"""
+
+import json
+import os
+import random
+import shlex
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+from mock_servers import AnthropicStandIn, SparloStandIn
+
+BENCHMARK = Path(__file__).resolve().parent.parent / "benchmark.py"
+COMMANDS = ["generate", "batch", "evaluate", "import-reports", "batch-claude-batches", "evaluate-async-batch"]
+SEGMENTS = ["PDC", "RDH", "DTS", "IDF"]
+TOPICS = ["gripper", "heat exchanger", "battery enclosure", "pump seal", "drone frame", "injection mould",
+          "solar tracker", "valve actuator", "conveyor belt", "sensor housing"]
+
+
+def synthetic_problems(count: int, seed: int = 0) -> list[dict]:
+    """count distinct problems in the batch PROBLEMS_FILE format."""
+    rng = random.Random(seed)
+    problems = []
+    for i in range(count):
+        topic = rng.choice(TOPICS)
+        problems.append({
+            "problem": f"Load test problem {i}: our {topic} loses {rng.randint(5, 40)}% efficiency after "
+                       f"{rng.randint(100, 5000)} cycles at {rng.randint(20, 120)} C. Reduce the loss below "
+                       f"{rng.randint(1, 4)}% without raising unit cost by more than {rng.randint(5, 20)}%.",
+            "segment": rng.choice(SEGMENTS),
+            "summary": f"{topic.title()} efficiency loss {i}",
+            "prior_art": rng.choice(["Low", "Medium", "High"]),
+            "domain": rng.choice(["Single", "Cross"]),
+            "contradiction": rng.choice(["Vague", "Clear", "Sharp"]),
+            "sweetspot": rng.randint(1, 5),
+            "expected": rng.choice(["A", "B", "C", "D", "F"])
+        })
+    return problems
+
+
+def run_cli(args: list[str], cwd: Path, env: dict, log_name: str) -> dict:
+    """Run benchmark.py with args in cwd. Returns wall and CPU seconds, peak RSS (MB) and exit code."""
+    start = time.perf_counter()
+    with open(cwd / f"{log_name}.log", "a") as log:
+        proc = subprocess.Popen([sys.executable, str(BENCHMARK), *args], cwd=cwd, env=env,
+                                stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    peak_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {
+        "wall_sec": time.perf_counter() - start,
+        "cpu_sec": usage.ru_utime + usage.ru_stime,
+        "peak_mb": peak_mb,
+        "exit_code": proc.returncode
+    }
+
+
+def finished(workdir: Path, where: str) -> int:
+    """Rows of workdir's results store matching where (0 if there is no store)."""
+    if not (workdir / "results.db").exists():
+        return 0
+    conn = sqlite3.connect(workdir / "results.db")
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM results WHERE {where}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+COMPLETE = "sparlo_status = 'complete' AND claude_status = 'complete'"
+EVALUATED = "evaluated = 'true'"
+
+
+def request_delta(before: dict, after: dict) -> int:
+    return sum(after.values()) - sum(before.values())
+
+
+def measure(name: str, size: int, runs: list[dict], sparlo: SparloStandIn, anthropic: AnthropicStandIn,
+            before: tuple, done: int) -> dict:
+    """Combine the runs of one command into a result row (summed times, largest peak memory)."""
+    return {
+        "command": name,
+        "problems": size,
+        "done": done,
+        "runs": len(runs),
+        "wall_sec": sum(r["wall_sec"] for r in runs),
+        "cpu_sec": sum(r["cpu_sec"] for r in runs),
+        "peak_mb": max(r["peak_mb"] for r in runs),
+        "sparlo_requests": request_delta(before[0], sparlo.stats()),
+        "anthropic_requests": request_delta(before[1], anthropic.stats()),
+        "failed_runs": sum(1 for r in runs if r["exit_code"] != 0)
+    }
+
+
+def run_size(size: int, commands: list[str], sparlo: SparloStandIn, anthropic: AnthropicStandIn, env: dict,
+             generate_max: int, batch_args: list[str], keep: bool) -> list[dict]:
+    """Run the selected commands against size synthetic problems."""
+    workdir = Path(tempfile.mkdtemp(prefix=f"sparlo-loadtest-{size}-"))
+    problems = synthetic_problems(size)
+    with open(workdir / "problems.json", "w") as f:
+        json.dump(problems, f)
+    concurrency = str(min(size, 16))
+    results = []
+
+    def snapshot():
+        return (sparlo.stats(), anthropic.stats())
+
+    if "generate" in commands:
+        gen_dir = workdir / "generate"
+        gen_dir.mkdir()
+        before = snapshot()
+        runs = []
+        for p in problems[:generate_max]:
+            runs.append(run_cli(["--no-cache", "generate", "--problem", p["problem"], "--segment", p["segment"],
+                                 "--summary", p["summary"], "--prior-art", p["prior_art"], "--domain", p["domain"],
+                                 "--contradiction", p["contradiction"], "--sweetspot", str(p["sweetspot"]),
+                                 "--expected", p["expected"]], gen_dir, env, "generate"))
+        results.append(measure("generate", min(size, generate_max), runs, sparlo, anthropic, before,
+                               finished(gen_dir, COMPLETE)))
+
+    if {"batch", "evaluate", "import-reports"} & set(commands):
+        before = snapshot()
+        run = run_cli(["--no-cache", "batch", "problems.json", "--max-in-flight", str(size), "--poll-rps", "50",
+                       "--max-concurrency", concurrency, *batch_args], workdir, env, "batch")
+        if "batch" in commands:
+            results.append(measure("batch", size, [run], sparlo, anthropic, before, finished(workdir, COMPLETE)))
+
+    if "evaluate" in commands:
+        before = snapshot()
+        run = run_cli(["--no-cache", "evaluate", "--workers", concurrency], workdir, env, "evaluate")
+        results.append(measure("evaluate", size, [run], sparlo, anthropic, before, finished(workdir, EVALUATED)))
+
+    if "import-reports" in commands:
+        import_dir = workdir / "import"
+        import_dir.mkdir()
+        before = snapshot()
+        run = run_cli(["import-reports", "--reports-dir", str(workdir / "reports")], import_dir, env, "import-reports")
+        results.append(measure("import-reports", size, [run], sparlo, anthropic, before,
+                               finished(import_dir, "1")))
+
+    if {"batch-claude-batches", "evaluate-async-batch"} & set(commands):
+        batches_dir = workdir / "message-batches"
+        batches_dir.mkdir()
+        shutil.copy(workdir / "problems.json", batches_dir)
+        before = snapshot()
+        run = run_cli(["--no-cache", "batch", "problems.json", "--claude-via-batches", "--max-in-flight", str(size),
+                       "--poll-rps", "50", *batch_args], batches_dir, env, "batch")
+        if "batch-claude-batches" in commands:
+            results.append(measure("batch-claude-batches", size, [run], sparlo, anthropic, before,
+                                   finished(batches_dir, COMPLETE)))
+
+    if "evaluate-async-batch" in commands:
+        before = snapshot()
+        run = run_cli(["--no-cache", "evaluate", "--async-batch"], batches_dir, env, "evaluate")
+        results.append(measure("evaluate-async-batch", size, [run], sparlo, anthropic, before,
+                               finished(batches_dir, EVALUATED)))
+
+    if keep:
+        click.echo(f"  Kept {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def echo_results(results: list[dict]):
+    click.echo(f"\n{'command':<22}{'problems':>9}{'done':>6}{'runs':>6}{'wall s':>10}{'cpu s':>9}{'peak MB':>9}"
+               f"{'sparlo req':>12}{'claude req':>12}{'failed':>8}")
+    for r in results:
+        click.echo(f"{r['command']:<22}{r['problems']:>9}{r['done']:>6}{r['runs']:>6}{r['wall_sec']:>10.1f}"
+                   f"{r['cpu_sec']:>9.1f}"
+                   f"{r['peak_mb']:>9.0f}{r['sparlo_requests']:>12}{r['anthropic_requests']:>12}{r['failed_runs']:>8}")
+
+
+@click.command()
+@click.option('--sizes', default='10,100,1000', help='Comma-separated problem counts')
+@click.option('--commands', default=','.join(COMMANDS), help='Comma-separated commands to drive')
+@click.option('--report-seconds', default=5.0, help='Median Sparlo report duration')
+@click.option('--report-sigma', default=0.3, help='Log-normal sigma of report durations')
+@click.option('--claude-seconds', default=0.5, help='Median Claude response latency')
+@click.option('--claude-sigma', default=0.3, help='Log-normal sigma of Claude latencies')
+@click.option('--batch-seconds', default=0.0, help='How long a Message Batch stays in progress')
+@click.option('--error-rate', default=0.0, help='Share of report submissions and Claude calls rejected (503/429)')
+@click.option('--poll-error-rate', default=0.0, help='Share of Sparlo status polls that fail with 500')
+@click.option('--fail-rate', default=0.0, help='Share of Sparlo reports that end as failed')
+@click.option('--report-kb', default=200, help='Size of each completed Sparlo report')
+@click.option('--generate-max', default=10,
+              help='Problems run through generate per size (each waits at least one poll interval)')
+@click.option('--batch-args', default='', help='Extra arguments for batch, e.g. "--webhook --webhook-port 0"')
+@click.option('--json', 'json_path', type=click.Path(dir_okay=False), help='Also write the results to this file')
+@click.option('--keep', is_flag=True, help='Keep the working directories for inspection')
+def main(sizes, commands, report_seconds, report_sigma, claude_seconds, claude_sigma, batch_seconds, error_rate,
+         poll_error_rate, fail_rate, report_kb, generate_max, batch_args, json_path, keep):
+    """Load test benchmark.py against local Sparlo and Anthropic stand-ins."""
+    commands = [c.strip() for c in commands.split(',') if c.strip()]
+    unknown = set(commands) - set(COMMANDS)
+    if unknown:
+        raise click.BadParameter(f"unknown commands: {', '.join(sorted(unknown))}", param_hint='--commands')
+
+    sparlo = SparloStandIn(report_seconds=report_seconds, report_sigma=report_sigma, error_rate=error_rate,
+                           poll_error_rate=poll_error_rate, fail_rate=fail_rate, report_kb=report_kb)
+    anthropic = AnthropicStandIn(latency_seconds=claude_seconds, latency_sigma=claude_sigma, error_rate=error_rate,
+                                 batch_seconds=batch_seconds)
+    env = dict(os.environ, SPARLO_API_URL=sparlo.url, ANTHROPIC_BASE_URL=anthropic.url,
+               ANTHROPIC_API_KEY="sk-loadtest", BENCHMARK_API_KEY="loadtest", ANTHROPIC_RPM="1000000",
+               BENCHMARK_CALLBACK_SECRET="loadtest")
+
+    results = []
+    try:
+        for size in [int(s) for s in sizes.split(',')]:
+            click.echo(f"Running {size} problems...")
+            results.extend(run_size(size, commands, sparlo, anthropic, env, generate_max, shlex.split(batch_args), keep))
+    finally:
+        sparlo.close()
+        anthropic.close()
+
+    echo_results(results)
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump({"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                       "settings": {"report_seconds": report_seconds, "report_sigma": report_sigma,
+                                    "claude_seconds": claude_seconds, "batch_seconds": batch_seconds,
+                                    "error_rate": error_rate,
+                                    "poll_error_rate": poll_error_rate, "fail_rate": fail_rate,
+                                    "report_kb": report_kb, "batch_args": batch_args},
+                       "results": results}, f, indent=2)
+        click.echo(f"\nResults written to {json_path}")
+
+
+if __name__ == '__main__':
+    main()
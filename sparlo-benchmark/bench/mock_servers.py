@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the Sparlo benchmark API and the Anthropic Messages API.
+
+Used by loadtest.py to exercise the CLI without real 25-minute reports or paid
+Claude calls. Report durations and Claude latencies are drawn from log-normal
+distributions, submissions and calls can fail at a configurable rate, and
+reports walk through the Sparlo pipeline steps while they run.
+
+Run standalone to point a manual benchmark.py session at them:
+
+    python bench/mock_servers.py --report-seconds 30
+    SPARLO_API_URL=http://127.0.0.1:8765 ANTHROPIC_BASE_URL=http://127.0.0.1:8766 \\
+        ANTHROPIC_API_KEY=sk-mock BENCHMARK_API_KEY=mock python benchmark.py batch problems.example.json
+
+Completion callbacks are signed with the secret "loadtest", so add
+BENCHMARK_CALLBACK_SECRET=loadtest to try 'batch --webhook'.
+"""
+
+import hmac
+import json
+import math
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import click
+
+SPARLO_STEPS = ["an0-m", "an1.5-m", "an1.7-m", "an2-m", "an3-m", "an4-m", "an5-m"]
+SCORE_DIMENSIONS = ["understanding", "novelty", "relevance", "credibility", "actionability", "citations"]
+
+
+def iso_time(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def lognormal(median: float, sigma: float) -> float:
+    """A log-normal sample with the given median (sigma 0 always returns the median)."""
+    if median <= 0:
+        return 0.0
+    return random.lognormvariate(math.log(median), sigma) if sigma > 0 else median
+
+
+class StandIn:
+    """A ThreadingHTTPServer on a free local port, counting the requests it serves."""
+
+    handler = None
+
+    def __init__(self, port: int = 0, **config):
+        self.config = config
+        self.counts = {}
+        self.lock = threading.Lock()
+        handler = type(f"{type(self).__name__}Handler", (self.handler,), {"stand_in": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def count(self, key: str):
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return dict(self.counts)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    stand_in = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get("content-length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def send_json(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class SparloHandler(JSONHandler):
+    def do_POST(self):
+        server = self.stand_in
+        body = self.read_json()
+        if self.path != "/api/benchmark/reports":
+            return self.send_json(404, {"error": "Not found"})
+        if random.random() < server.config["error_rate"]:
+            server.count("create_rejected")
+            return self.send_json(503, {"error": "Busy"}, {"retry-after": "1"})
+        server.count("create")
+
+        report_id = str(uuid.uuid4())
+        failed = random.random() < server.config["fail_rate"]
+        duration = lognormal(server.config["report_seconds"], server.config["report_sigma"])
+        with server.lock:
+            server.reports[report_id] = {"started": time.time(), "duration": duration, "failed": failed}
+        if body.get("callbackUrl"):
+            threading.Timer(duration, server.callback, (body["callbackUrl"], report_id, failed)).start()
+        self.send_json(200, {"success": True, "reportId": report_id, "conversationId": str(uuid.uuid4())})
+
+    def do_GET(self):
+        server = self.stand_in
+        if not self.path.startswith("/api/benchmark/reports/"):
+            return self.send_json(404, {"error": "Not found"})
+        server.count("poll")
+        if random.random() < server.config["poll_error_rate"]:
+            return self.send_json(500, {"error": "Internal error"})
+        report_id = self.path.rsplit("/", 1)[1]
+        report = server.reports.get(report_id)
+        if report is None:
+            return self.send_json(404, {"error": "Report not found"})
+
+        steps = server.config["steps"]
+        fraction = (time.time() - report["started"]) / report["duration"] if report["duration"] else 1
+        if fraction >= 1:
+            if report["failed"]:
+                return self.send_json(200, {"id": report_id, "status": "failed", "currentStep": steps[-1],
+                                            "phaseProgress": 0})
+            return self.send_json(200, {"id": report_id, "status": "complete", "currentStep": "complete",
+                                        "phaseProgress": 100, "title": "Mock report",
+                                        "reportData": server.report_data()})
+        position = fraction * len(steps)
+        return self.send_json(200, {"id": report_id, "status": "processing", "currentStep": steps[int(position)],
+                                    "phaseProgress": int((position - int(position)) * 100)})
+
+
+class SparloStandIn(StandIn):
+    """Stand-in for POST/GET /api/benchmark/reports, including completion callbacks.
+
+    Reports take report_seconds (median, log-normal with report_sigma) and then
+    complete, or fail with probability fail_rate. Creation is rejected with 503
+    at error_rate and status polls fail with 500 at poll_error_rate. Callbacks
+    are signed with callback_secret, as the backend signs them.
+    """
+
+    handler = SparloHandler
+
+    def __init__(self, port: int = 0, report_seconds: float = 5, report_sigma: float = 0.3, error_rate: float = 0,
+                 poll_error_rate: float = 0, fail_rate: float = 0, report_kb: int = 200, steps: list = None,
+                 callback_secret: str = "loadtest"):
+        self.reports = {}
+        self.callbacks = {"sent": 0, "failed": 0}  # outgoing, so not in stats()
+        self.body = "Mock analysis paragraph for load testing. " * (report_kb * 1024 // 44 // 4)
+        super().__init__(port, report_seconds=report_seconds, report_sigma=report_sigma, error_rate=error_rate,
+                         poll_error_rate=poll_error_rate, fail_rate=fail_rate, steps=steps or SPARLO_STEPS,
+                         callback_secret=callback_secret)
+
+    def report_data(self) -> dict:
+        return {
+            "mode": "hybrid",
+            "report": {section: self.body for section in
+                       ("executive_summary", "problem_analysis", "solution_approaches", "recommendations")},
+            "tokenUsage": {"inputTokens": 120000, "outputTokens": 30000, "totalTokens": 150000, "costUsd": 1.35}
+        }
+
+    def callback(self, url: str, report_id: str, failed: bool):
+        data = json.dumps({"reportId": report_id, "status": "failed" if failed else "complete"}).encode()
+        timestamp = str(int(time.time()))
+        signature = hmac.new(self.config["callback_secret"].encode(), timestamp.encode() + b"." + data,
+                             "sha256").hexdigest()
+        request = urllib.request.Request(url, data=data, method="POST", headers={
+            "content-type": "application/json", "x-sparlo-timestamp": timestamp,
+            "x-sparlo-signature": f"sha256={signature}"})
+        try:
+            urllib.request.urlopen(request, timeout=10).read()
+            outcome = "sent"
+        except OSError:
+            outcome = "failed"
+        with self.lock:
+            self.callbacks[outcome] += 1
+
+
+class AnthropicHandler(JSONHandler):
+    def do_POST(self):
+        server = self.stand_in
+        if self.path.startswith("/v1/messages/batches"):
+            server.count("batch_create")
+            return self.send_json(200, server.create_batch(self.read_json()["requests"]))
+        if not self.path.startswith("/v1/messages"):
+            return self.send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": "Not found"}})
+        params = self.read_json()
+        if random.random() < server.config["error_rate"]:
+            server.count("rate_limited")
+            return self.send_json(429, {"type": "error", "error": {"type": "rate_limit_error", "message": "Slow down"}},
+                                  {"retry-after": "1"})
+        server.count("judge" if params.get("tools") else "generate")
+        time.sleep(lognormal(server.config["latency_seconds"], server.config["latency_sigma"]))
+
+        headers = {"anthropic-ratelimit-requests-limit": "100000",
+                   "anthropic-ratelimit-requests-remaining": "99999", "request-id": f"req_{uuid.uuid4().hex[:12]}"}
+        if params.get("stream"):
+            return self.stream(params, headers)
+        self.send_json(200, server.message(params), headers)
+
+    def do_GET(self):
+        server = self.stand_in
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        batch = server.batches.get(parts[3]) if parts[:3] == ["v1", "messages", "batches"] and len(parts) > 3 else None
+        if batch is None:
+            return self.send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": "Not found"}})
+        if len(parts) == 4:
+            server.count("batch_poll")
+            return self.send_json(200, server.batch_status(batch))
+        if parts[4:] != ["results"] or not server.batch_ended(batch):
+            return self.send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": "Not found"}})
+        server.count("batch_results")
+        data = "".join(json.dumps(result) + "\n" for result in batch["results"]).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/binary")
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def stream(self, params: dict, headers: dict):
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("connection", "close")
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        message = self.stand_in.message(params)
+        text = message["content"][0]["text"]
+
+        def event(kind: str, data: dict):
+            self.wfile.write(f"event: {kind}\ndata: {json.dumps(dict(data, type=kind))}\n\n".encode())
+
+        event("message_start", {"message": dict(message, content=[], stop_reason=None,
+                                                usage=dict(message["usage"], output_tokens=1))})
+        event("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+        for start in range(0, len(text), 2000):
+            event("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": text[start:start + 2000]}})
+        event("content_block_stop", {"index": 0})
+        event("message_delta", {"delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                "usage": {"output_tokens": message["usage"]["output_tokens"]}})
+        event("message_stop", {})
+        self.wfile.flush()
+        self.close_connection = True
+
+
+class AnthropicStandIn(StandIn):
+    """Stand-in for POST /v1/messages (plain and streamed) and the Message Batches endpoints.
+
+    Replies after latency_seconds (median, log-normal with latency_sigma) with a
+    report of output_kb for contender calls, or a submit_evaluation tool call
+    for judge calls. Returns 429 at error_rate. Message Batches end batch_seconds
+    after they are created; each of their requests errors at error_rate.
+    """
+
+    handler = AnthropicHandler
+
+    def __init__(self, port: int = 0, latency_seconds: float = 0.5, latency_sigma: float = 0.3,
+                 error_rate: float = 0, output_kb: int = 20, batch_seconds: float = 0):
+        self.text = "## Mock solution\n" + "Mock engineering reasoning for load testing. " * (output_kb * 1024 // 46)
+        self.batches = {}
+        super().__init__(port, latency_seconds=latency_seconds, latency_sigma=latency_sigma, error_rate=error_rate,
+                         batch_seconds=batch_seconds)
+
+    def create_batch(self, requests: list[dict]) -> dict:
+        """Record a batch and its results up front; they are served once the batch has ended."""
+        results = []
+        for request in requests:
+            params = request["params"]
+            self.count("batch_judge" if params.get("tools") else "batch_generate")
+            if random.random() < self.config["error_rate"]:
+                result = {"type": "errored", "error": {"type": "error", "error": {
+                    "type": "overloaded_error", "message": "Overloaded"}}}
+            else:
+                result = {"type": "succeeded", "message": self.message(params)}
+            results.append({"custom_id": request["custom_id"], "result": result})
+        batch = {"id": f"msgbatch_{uuid.uuid4().hex[:24]}", "created": time.time(), "results": results}
+        with self.lock:
+            self.batches[batch["id"]] = batch
+        return self.batch_status(batch)
+
+    def batch_ended(self, batch: dict) -> bool:
+        return time.time() - batch["created"] >= self.config["batch_seconds"]
+
+    def batch_status(self, batch: dict) -> dict:
+        ended = self.batch_ended(batch)
+        counts = {"processing": 0, "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0}
+        for result in batch["results"]:
+            counts[result["result"]["type"] if ended else "processing"] += 1
+        return {
+            "id": batch["id"], "type": "message_batch", "processing_status": "ended" if ended else "in_progress",
+            "request_counts": counts, "created_at": iso_time(batch["created"]),
+            "expires_at": iso_time(batch["created"] + 86400),
+            "ended_at": iso_time(batch["created"] + self.config["batch_seconds"]) if ended else None,
+            "archived_at": None, "cancel_initiated_at": None,
+            "results_url": f"{self.url}/v1/messages/batches/{batch['id']}/results" if ended else None
+        }
+
+    def message(self, params: dict) -> dict:
+        if params.get("tools"):
+            content = [{"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:12]}", "name": "submit_evaluation",
+                        "input": self.evaluation()}]
+        else:
+            content = [{"type": "text", "text": self.text}]
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:12]}", "type": "message", "role": "assistant", "model": params["model"],
+            "content": content, "stop_reason": "tool_use" if params.get("tools") else "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 4000, "output_tokens": len(self.text) // 4 if not params.get("tools") else 900,
+                      "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0}
+        }
+
+    @staticmethod
+    def evaluation() -> dict:
+        sparlo = {dim: random.randint(5, 10) for dim in SCORE_DIMENSIONS}
+        claude = {dim: random.randint(4, 9) for dim in SCORE_DIMENSIONS}
+        margin = sum(sparlo.values()) - sum(claude.values())
+        return {
+            "sparlo_scores": sparlo, "claude_scores": claude,
+            "scoring_rationale": {dim: "Mock rationale." for dim in SCORE_DIMENSIONS},
+            "winner": "Sparlo" if margin > 0 else "Claude" if margin < 0 else "Tie",
+            "sparlo_strengths": "Mock strengths.", "claude_strengths": "Mock strengths.",
+            "key_insight": "Mock insight.", "cross_domain_sparlo": 2, "cross_domain_claude": 1,
+            "cross_domain_list_sparlo": ["biology", "aerospace"], "cross_domain_list_claude": ["automotive"],
+            "would_pay_for_sparlo": margin > 0, "would_pay_rationale": "Mock rationale.",
+            "verdict_summary": "Mock verdict."
+        }
+
+
+@click.command()
+@click.option('--sparlo-port', default=8765, help='Port for the Sparlo stand-in')
+@click.option('--anthropic-port', default=8766, help='Port for the Anthropic stand-in')
+@click.option('--report-seconds', default=30.0, help='Median Sparlo report duration')
+@click.option('--report-sigma', default=0.3, help='Log-normal sigma of report durations')
+@click.option('--claude-seconds', default=2.0, help='Median Claude response latency')
+@click.option('--error-rate', default=0.0, help='Share of report submissions and Claude calls rejected (503/429)')
+def main(sparlo_port, anthropic_port, report_seconds, report_sigma, claude_seconds, error_rate):
+    """Serve the Sparlo and Anthropic stand-ins until interrupted."""
+    sparlo = SparloStandIn(sparlo_port, report_seconds=report_seconds, report_sigma=report_sigma, error_rate=error_rate)
+    anthropic = AnthropicStandIn(anthropic_port, latency_seconds=claude_seconds, error_rate=error_rate)
+    click.echo(f"Sparlo stand-in:    {sparlo.url}")
+    click.echo(f"Anthropic stand-in: {anthropic.url}")
+    try:
+        while True:
+            time.sleep(60)
+            click.echo(f"  sparlo {sparlo.stats()}  anthropic {anthropic.stats()}")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
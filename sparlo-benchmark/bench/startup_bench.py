@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the benchmark CLI.
+
+Runs quick commands (--help, status and queue by default) as fresh
+processes against a synthetic results store and reports their wall time,
+alone and over a bare `python -c pass`. It also checks which modules each
+command imported: the API clients (anthropic, httpx, requests, http.server)
+must only be imported by commands that call an API.
+
+The run fails (exit code 1) when any command's median time over the bare
+interpreter exceeds --budget-ms, or when it imports a forbidden module:
+
+    python bench/startup_bench.py
+    python bench/startup_bench.py --rows 100000 --budget-ms 80 --json startup.json
+"""
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import click
+
+BENCHMARK = Path(__file__).resolve().parent.parent / "benchmark.py"
+FORBIDDEN = ["anthropic", "httpx", "requests", "http.server"]
+WATCHED = FORBIDDEN + ["dotenv", "sqlite3"]
+
+# Runs the CLI in-process, then reports which watched modules it imported on the last line
+PROBE = """
+import json, os, runpy, sys
+sys.argv = [{script!r}] + {args!r}
+sys.path.insert(0, os.path.dirname({script!r}))  # As 'python benchmark.py' would
+try:
+    runpy.run_path({script!r}, run_name="__main__")
+except SystemExit:
+    pass
+print(json.dumps(sorted(m for m in {watched!r} if m in sys.modules)))
+"""
+
+
+def build_store(workdir: Path, rows: int):
+    """A results.db with rows synthetic results, half complete and a quarter evaluated."""
+    sys.path.insert(0, str(BENCHMARK.parent))
+    import benchmark as bm
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        bm.init_store()
+        conn = bm.get_store()
+        with conn:
+            conn.executemany(
+                "INSERT INTO results (problem_id, created_at, run_id, problem_text, segment, sparlo_status, "
+                "claude_status, evaluated, winner) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((str(uuid.uuid4()), "2026-01-01T00:00:00", f"batch-{i // 1000:04d}", f"Problem {i}",
+                  "PDC", "complete" if i % 2 == 0 else "error", "complete",
+                  "true" if i % 4 == 0 else "false", ("Sparlo", "Claude", "Tie")[i % 3] if i % 4 == 0 else None)
+                 for i in range(rows))
+            )
+        bm.init_store()  # Fingerprint the rows now rather than in the first timed run
+        conn.close()
+        bm._store["conn"] = None
+    finally:
+        os.chdir(cwd)
+
+
+def time_command(args: list[str], workdir: Path, repeat: int) -> list[float]:
+    """Wall seconds of repeat fresh runs of args."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=workdir, capture_output=True, check=False)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def imported_modules(args: list[str], workdir: Path) -> list[str]:
+    probe = PROBE.format(script=str(BENCHMARK), args=args, watched=WATCHED)
+    out = subprocess.run([sys.executable, "-c", probe], cwd=workdir, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+@click.command()
+@click.option('--commands', default='--help,status,queue', help='Comma-separated commands to time')
+@click.option('--rows', default=10000, help='Rows in the synthetic results store')
+@click.option('--repeat', default=15, help='Runs per command')
+@click.option('--budget-ms', default=100.0, help='Max median milliseconds over a bare interpreter start')
+@click.option('--json', 'json_path', type=click.Path(dir_okay=False), help='Also write the results to this file')
+def main(commands, rows, repeat, budget_ms, json_path):
+    """Time CLI startup for quick commands and check it stays within budget."""
+    workdir = Path(tempfile.mkdtemp(prefix="sparlo-startup-"))
+    try:
+        build_store(workdir, rows)
+        bare = statistics.median(time_command([sys.executable, "-c", "pass"], workdir, repeat))
+        click.echo(f"{rows} rows, {repeat} runs each; bare interpreter start {bare * 1000:.0f} ms\n")
+        click.echo(f"{'command':<12}{'median ms':>11}{'p95 ms':>9}{'over bare':>11}  imported")
+
+        results, failures = [], []
+        for command in [c.strip() for c in commands.split(',') if c.strip()]:
+            args = command.split()
+            times = sorted(time_command([sys.executable, str(BENCHMARK), *args], workdir, repeat))
+            median = statistics.median(times)
+            result = {
+                "command": command,
+                "median_ms": median * 1000,
+                "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))] * 1000,
+                "overhead_ms": (median - bare) * 1000,
+                "imported": imported_modules(args, workdir)
+            }
+            results.append(result)
+            click.echo(f"{command:<12}{result['median_ms']:>11.0f}{result['p95_ms']:>9.0f}{result['overhead_ms']:>11.0f}"
+                       f"  {', '.join(result['imported']) or '-'}")
+
+            if result["overhead_ms"] > budget_ms:
+                failures.append(f"{command}: {result['overhead_ms']:.0f} ms over bare start (budget {budget_ms:.0f} ms)")
+            heavy = [m for m in result["imported"] if m in FORBIDDEN]
+            if heavy:
+                failures.append(f"{command}: imported {', '.join(heavy)}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump({"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                       "rows": rows, "bare_ms": bare * 1000, "budget_ms": budget_ms, "results": results}, f, indent=2)
+        click.echo(f"\nResults written to {json_path}")
+
+    if failures:
+        click.echo("\nOVER BUDGET:")
+        for line in failures:
+            click.echo(f"  {line}")
+        sys.exit(1)
+    click.echo(f"\nAll commands within {budget_ms:.0f} ms of a bare interpreter start")
+
+
+if __name__ == '__main__':
+    main()
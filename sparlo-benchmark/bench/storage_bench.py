@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the results store and report serialization.
+
+Builds a synthetic results store of 1k, 10k and 100k rows in a scratch
+directory and times each storage operation the CLI performs: row inserts
+(with blob writes and fingerprints), the full and unevaluated scans, the
+status query, evaluation commits, output blob reads, gzipped report writes
+and reads, CSV export and CSV migration. Output bodies are 100-500 KB
+(Sparlo) and 10-40 KB (Claude) of generated prose. Throughput is timed with
+tracemalloc off; peak traced memory comes from a separate traced pass.
+
+Save a baseline, then compare later runs against it; any operation whose
+throughput drops (or whose peak memory grows) by more than --threshold
+fails the run with exit code 1:
+
+    python bench/storage_bench.py --save-baseline bench/storage_baseline.json
+    python bench/storage_bench.py --baseline bench/storage_baseline.json
+    python bench/storage_bench.py --sizes 1000,10000           # quicker check
+"""
+
+import contextlib
+import functools
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import benchmark as bm  # noqa: E402
+
+WORDS = ("thermal gradient actuator compliance friction tolerance fatigue laminate polymer sensor feedback "
+         "vibration damping throughput yield coating alloy bearing lubricant enclosure airflow manifold "
+         "torque hysteresis calibration prototype supplier certification moisture abrasion stiffness").split()
+SCORE = {dim: 7 for dim in ("understanding", "novelty", "relevance", "credibility", "actionability", "citations")}
+EVALUATION = {
+    "sparlo_scores": SCORE, "claude_scores": dict(SCORE, novelty=5),
+    "scoring_rationale": {dim: "Synthetic rationale." for dim in SCORE},
+    "winner": "Sparlo", "sparlo_strengths": "s", "claude_strengths": "c", "key_insight": "k",
+    "cross_domain_sparlo": 2, "cross_domain_claude": 1, "cross_domain_list_sparlo": ["a", "b"],
+    "cross_domain_list_claude": ["c"], "would_pay_for_sparlo": True, "would_pay_rationale": "w",
+    "verdict_summary": "v"
+}
+
+
+def prose(rng: random.Random, size: int) -> str:
+    """Roughly size bytes of markdown-ish text with paragraphs and headings."""
+    parts, length = [], 0
+    while length < size:
+        if rng.random() < 0.05:
+            chunk = f"\n## {rng.choice(WORDS).title()} {rng.choice(WORDS)}\n"
+        else:
+            chunk = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))) + ".\n\n"
+        parts.append(chunk)
+        length += len(chunk)
+    return "".join(parts)[:size]
+
+
+def synthetic_row(i: int, rng: random.Random, sparlo_body: str, claude_body: str) -> dict:
+    return {
+        "problem_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "created_at": "2026-01-01T00:00:00",
+        "run_id": f"batch-{i // 100:05d}",
+        "problem_text": f"Problem {i}: " + " ".join(rng.choice(WORDS) for _ in range(60)),
+        "segment": rng.choice(["PDC", "RDH", "DTS", "IDF"]),
+        "problem_summary": f"Synthetic problem {i}",
+        "prior_art": rng.choice(["Low", "Medium", "High"]),
+        "domain_spec": rng.choice(["Single", "Cross"]),
+        "contradiction": rng.choice(["Vague", "Clear", "Sharp"]),
+        "sweetspot_pred": rng.randint(1, 5),
+        "expected_grade": rng.choice(["A", "B", "C"]),
+        "sparlo_output": sparlo_body,
+        "claude_output": claude_body,
+        "sparlo_status": "complete",
+        "claude_status": "complete",
+        "sparlo_time_sec": rng.uniform(1200, 2000),
+        "claude_time_sec": rng.uniform(20, 60),
+        "evaluated": "false"
+    }
+
+
+def reset_store(db_file: str = "results.db"):
+    """Point the CLI's store and trace file at the current directory again."""
+    if bm._store["conn"] is not None:
+        bm._store["conn"].close()
+        bm._store["conn"] = None
+    if bm._trace["file"] is not None:
+        bm._trace["file"].close()
+        bm._trace["file"] = None
+    bm.DB_FILE = Path(db_file)
+
+
+def timed(results: dict, name: str, items: int, nbytes: int, fn, repeat: int = 1, traced_fn=None):
+    """Record fn's throughput and the peak memory of one traced run.
+
+    fn runs repeat times (when it is read-only) with tracemalloc off, keeping the
+    fastest, since tracing slows allocation-heavy code severalfold. Peak memory
+    comes from one more run under tracemalloc: of fn again, or of traced_fn for
+    operations that cannot simply be repeated.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            (traced_fn or fn)()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    results[name] = {
+        "seconds": best,
+        "items": items,
+        "items_per_sec": items / best if best else None,
+        "mb_per_sec": nbytes / best / 1e6 if best and nbytes else None,
+        "peak_mb": peak / 1e6
+    }
+    click.echo(f"  {name:<20}{items:>8}{best:>10.2f}s{results[name]['items_per_sec'] or 0:>12.0f}/s"
+               f"{results[name]['mb_per_sec'] or 0:>10.1f} MB/s{results[name]['peak_mb']:>9.1f} MB")
+
+
+def run_size(size: int, sample: int, export_limit_mb: int, repeat: int, seed: int) -> dict:
+    """Build a size-row store in a scratch directory and time every operation on it."""
+    rng = random.Random(seed)
+    # Distinct bodies for the sampled rows; the rest reuse them, as content-addressed blobs allow
+    pool = [(prose(rng, rng.randint(100_000, 500_000)), prose(rng, rng.randint(10_000, 40_000)))
+            for _ in range(min(size, sample))]
+    rows = [synthetic_row(i, rng, *pool[i % len(pool)]) for i in range(size)]
+    body_bytes = sum(len(s) + len(c) for s, c in pool)
+    results = {}
+
+    workdir = Path(tempfile.mkdtemp(prefix=f"sparlo-storage-{size}-"))
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        reset_store()
+        bm.init_store()
+        click.echo(f"\n{size} rows ({len(pool)} distinct bodies, {body_bytes / 1e6:.0f} MB):")
+        click.echo(f"  {'operation':<20}{'items':>8}{'time':>11}{'rate':>14}{'throughput':>15}{'peak':>12}")
+
+        def insert_rows(rows):
+            for row in rows:
+                bm.insert_result(row)
+        # A tenth of the rows go in under tracemalloc; the rest are timed
+        traced, untraced = rows[:size // 10], rows[size // 10:]
+        timed(results, "insert_result", len(untraced),
+              sum(len(r['sparlo_output']) + len(r['claude_output']) for r in untraced),
+              functools.partial(insert_rows, untraced), traced_fn=functools.partial(insert_rows, traced))
+        del rows, traced, untraced
+
+        timed(results, "scan_all", size, 0, lambda: bm.read_results(), repeat)
+        timed(results, "scan_unevaluated", size, 0, lambda: bm.read_results(
+            "evaluated = 'false' AND sparlo_status = 'complete' AND claude_status = 'complete'"), repeat)
+        timed(results, "status", size, 0, lambda: bm.status.callback(), repeat)
+
+        sampled = bm.read_results(f"rowid <= {len(pool)}")
+        timed(results, "blob_read", len(sampled), body_bytes,
+              lambda: [bm.load_output(row, side) for row in sampled for side in bm.OUTPUT_SIDES], repeat)
+
+        def commit_evaluations():
+            for row in sampled:
+                bm.apply_evaluation(row, EVALUATION, {"input": 9000, "output": 900, "cache_read": 0, "cache_write": 0})
+                bm.commit_evaluation(row)
+        timed(results, "commit_evaluation", len(sampled), 0, commit_evaluations)
+
+        reports = [(row['problem_id'], {"problem_text": row['problem_text'], "report_data": {"report": body}})
+                   for row, (body, _) in zip(sampled, pool)]
+        sparlo_bytes = sum(len(body) for body, _ in pool)
+        timed(results, "write_report", len(reports), sparlo_bytes,
+              lambda: [bm.write_report(problem_id, "sparlo", data) for problem_id, data in reports])
+        timed(results, "read_report", len(reports), sparlo_bytes,
+              lambda: [bm.read_report(problem_id, "sparlo") for problem_id, _ in reports], repeat)
+
+        timed(results, "export_csv_refs", size, 0, lambda: bm.export_csv(Path("refs.csv"), inline_outputs=False))
+        inline_bytes = body_bytes * size / len(pool)
+        if inline_bytes <= export_limit_mb * 1e6:
+            timed(results, "export_csv_inline", size, inline_bytes, lambda: bm.export_csv(Path("inline.csv")))
+        else:
+            click.echo(f"  {'export_csv_inline':<20}skipped ({inline_bytes / 1e6:.0f} MB > --export-limit-mb)")
+
+        def migrate_into(db_file):
+            reset_store(db_file)
+            bm.init_store()
+            bm.migrate_csv(Path("refs.csv"))
+        timed(results, "migrate_csv", size, 0, lambda: migrate_into("migrated.db"),
+              traced_fn=lambda: migrate_into("migrated-traced.db"))
+    finally:
+        reset_store()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def regressions(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Operations slower (lower items/s) or hungrier (higher peak MB) than the baseline by more than threshold."""
+    found = []
+    for size, ops in current.items():
+        for name, result in ops.items():
+            base = baseline.get(size, {}).get(name)
+            if not base:
+                continue
+            if base["items_per_sec"] and result["items_per_sec"] < base["items_per_sec"] * (1 - threshold):
+                found.append(f"{name} @ {size} rows: {result['items_per_sec']:.0f}/s "
+                             f"vs baseline {base['items_per_sec']:.0f}/s")
+            # Ignore sub-megabyte noise in peak memory
+            if result["peak_mb"] > max(base["peak_mb"] * (1 + threshold), base["peak_mb"] + 1):
+                found.append(f"{name} @ {size} rows: peak {result['peak_mb']:.1f} MB "
+                             f"vs baseline {base['peak_mb']:.1f} MB")
+    return found
+
+
+@click.command()
+@click.option('--sizes', default='1000,10000,100000', help='Comma-separated row counts')
+@click.option('--sample', default=200, help='Distinct output bodies per corpus (and rows for per-body operations)')
+@click.option('--repeat', default=3, help='Runs of each read-only operation (the fastest is kept)')
+@click.option('--export-limit-mb', default=2048, help='Skip the inline CSV export above this many MB of bodies')
+@click.option('--seed', default=0, help='Random seed for the synthetic corpus')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Baseline JSON to compare against')
+@click.option('--threshold', default=0.25, help='Allowed throughput drop or memory growth vs the baseline')
+@click.option('--save-baseline', type=click.Path(dir_okay=False), help='Write these results as a new baseline')
+def main(sizes, sample, repeat, export_limit_mb, seed, baseline, threshold, save_baseline):
+    """Benchmark the results store and report serialization on synthetic corpora."""
+    current = {}
+    for size in [int(s) for s in sizes.split(',')]:
+        current[str(size)] = run_size(size, sample, export_limit_mb, repeat, seed)
+
+    if save_baseline:
+        with open(save_baseline, 'w') as f:
+            json.dump({"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                       "sample": sample, "results": current}, f, indent=2)
+        click.echo(f"\nBaseline written to {save_baseline}")
+
+    if baseline:
+        with open(baseline) as f:
+            found = regressions(current, json.load(f)["results"], threshold)
+        if found:
+            click.echo(f"\nREGRESSIONS (more than {threshold:.0%} worse than {baseline}):")
+            for line in found:
+                click.echo(f"  {line}")
+            sys.exit(1)
+        click.echo(f"\nNo regressions beyond {threshold:.0%} against {baseline}")
+
+
+if __name__ == '__main__':
+    main()
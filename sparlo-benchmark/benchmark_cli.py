@@ -0,0 +1,4011 @@
+"""Sparlo vs Claude benchmark CLI - Single file implementation
+
+Run through benchmark.py, which imports this module so its bytecode is cached.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import click
+
+# anthropic, httpx, requests and http.server, and stdlib modules that only some commands
+# need (csv, gzip, hashlib, ssl, concurrent.futures, ...), are imported where they are
+# first used, so commands that never call an API ('status', 'queue', 'cost', ...) start
+# in milliseconds
+if TYPE_CHECKING:
+    import ssl
+
+    import requests
+    from anthropic import Anthropic
+
+
+def load_env_file():
+    """Load the nearest .env above this script (as python-dotenv's find_dotenv does), if there is one."""
+    for directory in Path(__file__).resolve().parents:
+        if (directory / ".env").is_file():
+            from dotenv import load_dotenv
+            load_dotenv(directory / ".env")
+            return
+
+
+load_env_file()
+
+
+# Config
+SPARLO_URL = os.getenv("SPARLO_API_URL", "https://sparlo-production.up.railway.app")
+ANTHROPIC_KEY = os.getenv("ANTHROPIC_API_KEY")
+BENCHMARK_API_KEY = os.getenv("BENCHMARK_API_KEY")
+DB_FILE = Path("results.db")  # SQLite results store (schema = CSV_COLUMNS)
+CSV_FILE = Path("results.csv")  # Spreadsheet export / legacy store, see migrate and export-csv
+JOURNAL_FILE = Path("evaluations.jsonl")  # Legacy evaluation journal, folded in by migrate
+REPORTS_DIR = Path("reports")
+BLOBS_DIR = REPORTS_DIR / "blobs"  # Content-addressed, gzipped output bodies referenced by the results table
+RUNS_DIR = Path("runs")  # Batch job manifests, used by 'batch --resume'
+CACHE_DIR = Path("cache")  # Content-addressed Claude responses (contender and judge)
+TRACE_FILE = Path(os.getenv("TRACE_FILE", "traces.jsonl"))  # One JSON line per timed stage, see 'profile'
+BATCHES_DIR = Path("batches")  # Submitted Message Batches, so 'evaluate --async-batch' can reattach
+
+# Sparlo polling: hybrid pipeline steps in order, and scheduler bounds (seconds)
+SPARLO_STEPS = ["an0-m", "an1.5-m", "an1.7-m", "an2-m", "an3-m", "an4-m", "an5-m"]
+SPARLO_STEP_PRIOR_SEC = 210  # ~25 min / 7 steps until real step durations are observed
+POLL_MIN_INTERVAL = 5
+POLL_MAX_INTERVAL = 60
+POLL_MAX_BACKOFF = 300
+POLL_MAX_RPS = 2.0
+
+# Completion callbacks ('batch --webhook'): where the local receiver listens, the public URL
+# Sparlo should call if it cannot reach that address directly, the fallback poll interval
+# and the secret Sparlo signs callbacks with (its BENCHMARK_CALLBACK_SECRET)
+BENCHMARK_CALLBACK_SECRET = os.getenv("BENCHMARK_CALLBACK_SECRET")
+WEBHOOK_BIND = os.getenv("WEBHOOK_BIND", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8787"))
+WEBHOOK_PUBLIC_URL = os.getenv("WEBHOOK_PUBLIC_URL")
+WEBHOOK_FALLBACK_INTERVAL = 300
+WEBHOOK_MAX_SKEW = 300  # Seconds a signed callback's timestamp may be off
+
+# Sparlo admission control: reports running at once on the shared deployment, and how
+# submissions back off when it answers 429/5xx (doubling from SPARLO_SUBMIT_BACKOFF)
+SPARLO_MAX_IN_FLIGHT = int(os.getenv("SPARLO_MAX_IN_FLIGHT", "10"))
+SPARLO_SUBMIT_BACKOFF = 15
+SPARLO_SUBMIT_RETRIES = 8
+SPARLO_RETRY_STATUS = (429, 502, 503, 504)
+
+# Sparlo deadlines and stragglers: how long one report attempt may run (single runs and each
+# 'batch' attempt), how long a report may go without any step or progress change before
+# 'batch' resubmits it, and when a hedge is started
+SPARLO_DEADLINE_SEC = 2100
+SPARLO_STALL_SEC = 900
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 10
+
+# Shared work queue ('enqueue' / 'worker'): how long a claimed item stays leased without a
+# renewal, how many claims an item gets before it is marked failed, and the idle re-check (seconds)
+WORK_LEASE_SEC = int(os.getenv("WORK_LEASE_SEC", "600"))
+WORK_MAX_ATTEMPTS = 3
+WORK_IDLE_POLL = 15
+
+# Claude model for the contender and the judge, and USD prices per million tokens used by
+# the cost columns and 'cost' (Message Batches are billed at BATCH_DISCOUNT of these)
+CLAUDE_MODEL = "claude-opus-4-5-20251101"
+MODEL_PRICING = {
+    "claude-opus-4-5-20251101": {"input": 5.00, "output": 25.00, "cache_read": 0.50, "cache_write": 6.25},
+}
+BATCH_DISCOUNT = 0.5
+
+# Anthropic request budget: starting requests/minute for the token bucket (corrected from
+# rate-limit response headers) and how often to retry 429/529 responses
+ANTHROPIC_RPM = int(os.getenv("ANTHROPIC_RPM", "50"))
+ANTHROPIC_MAX_RETRIES = 6
+ANTHROPIC_RETRY_STATUS = (408, 429, 500, 502, 503, 529)
+
+# Message Batches: status poll interval (seconds) and per-batch limits (requests, request bytes)
+BATCH_POLL_INTERVAL = 60
+BATCH_MAX_REQUESTS = 100_000
+BATCH_MAX_BYTES = 200 * 1024 * 1024
+
+# Token budget for the two outputs in a judge prompt (together, approximate tokens); longer
+# outputs are compacted section by section to fit
+JUDGE_TOKEN_BUDGET = int(os.getenv("JUDGE_TOKEN_BUDGET", "30000"))
+
+# Response cache eviction limits
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_MB", "2048")) * 1024 * 1024
+CACHE_MAX_AGE_DAYS = int(os.getenv("CACHE_MAX_AGE_DAYS", "30"))
+
+# Connection pool size for the shared HTTP clients (raised to match --max-concurrency)
+DEFAULT_POOL_SIZE = 8
+
+# Duplicate detection: MinHash signature size, LSH bands (rows per band = permutations / bands)
+# and the default estimated Jaccard similarity above which a problem counts as a near-duplicate
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+DUPLICATE_SIMILARITY = 0.85
+
+# CSV columns (flat structure)
+CSV_COLUMNS = [
+    "problem_id", "created_at", "run_id", "problem_text", "problem_hash", "problem_minhash", "segment", "problem_summary",
+    "prior_art", "domain_spec", "contradiction", "sweetspot_pred", "expected_grade",
+    "sparlo_output_sha256", "sparlo_output_path", "claude_output_sha256", "claude_output_path",
+    "sparlo_status", "claude_status",
+    "sparlo_time_sec", "claude_time_sec", "claude_ttft_sec", "claude_tokens_per_sec", "sparlo_step_seconds",
+    "sparlo_attempts",
+    "sparlo_input_tokens", "sparlo_output_tokens", "sparlo_cache_read_tokens", "sparlo_cache_write_tokens",
+    "sparlo_cost_usd",
+    "claude_input_tokens", "claude_output_tokens", "claude_cache_read_tokens", "claude_cache_write_tokens",
+    "claude_cost_usd",
+    "sparlo_understanding", "sparlo_novelty", "sparlo_relevance",
+    "sparlo_credibility", "sparlo_actionability", "sparlo_citations", "sparlo_total",
+    "claude_understanding", "claude_novelty", "claude_relevance",
+    "claude_credibility", "claude_actionability", "claude_citations", "claude_total",
+    "winner", "score_margin", "sparlo_strengths", "claude_strengths",
+    "key_insight", "cross_domain_sparlo", "cross_domain_claude",
+    "cross_domain_list_sparlo", "cross_domain_list_claude",
+    "would_pay", "would_pay_rationale", "verdict_summary", "scoring_rationale",
+    "notes", "evaluated",
+    "judge_input_tokens", "judge_output_tokens", "judge_cache_read_tokens", "judge_cache_write_tokens",
+    "judge_cost_usd", "judge_time_sec"
+]
+
+# Output bodies are stored in BLOBS_DIR; rows hold their hash and path. CSV exports inline
+# the bodies again under the original column names.
+OUTPUT_SIDES = ("sparlo", "claude")
+EXPORT_COLUMNS = [col.replace("_sha256", "") for col in CSV_COLUMNS
+                  if not col.endswith("_output_path") and col != "problem_minhash"]
+
+# Columns written by an evaluation (everything from the first score onwards)
+EVALUATION_COLUMNS = CSV_COLUMNS[CSV_COLUMNS.index("sparlo_understanding"):]
+
+# SQLite column types for non-text columns in the results table
+COLUMN_TYPES = {
+    "sweetspot_pred": "INTEGER", "sparlo_time_sec": "REAL", "claude_time_sec": "REAL",
+    "claude_ttft_sec": "REAL", "claude_tokens_per_sec": "REAL", "sparlo_attempts": "INTEGER",
+    **{f"{source}_{kind}_tokens": "INTEGER" for source in ("sparlo", "claude", "judge")
+       for kind in ("input", "output", "cache_read", "cache_write")},
+    **{f"{source}_cost_usd": "REAL" for source in ("sparlo", "claude", "judge")},
+    "judge_time_sec": "REAL",
+    "score_margin": "INTEGER", "cross_domain_sparlo": "INTEGER", "cross_domain_claude": "INTEGER",
+    **{f"{side}_{dim}": "INTEGER" for side in ("sparlo", "claude")
+       for dim in ("understanding", "novelty", "relevance", "credibility", "actionability", "citations", "total")}
+}
+RESULT_INDEXES = ["problem_id", "problem_hash", "evaluated", "segment", "winner"]
+
+# Counters 'status' reads from the one-row results_summary table, kept current by triggers on
+# results so it never scans the table: each is 1 when a row ({r} = NEW, OLD or results) counts
+SUMMARY_COUNTERS = {
+    "total": "1",
+    "complete": "({r}.sparlo_status IS 'complete' AND {r}.claude_status IS 'complete')",
+    "evaluated": "({r}.evaluated IS 'true')",
+    "sparlo_wins": "({r}.evaluated IS 'true' AND {r}.winner IS 'Sparlo')",
+    "claude_wins": "({r}.evaluated IS 'true' AND {r}.winner IS 'Claude')"
+}
+SUMMARY_COLUMNS = ["sparlo_status", "claude_status", "evaluated", "winner"]
+
+# Work items for 'enqueue' / 'worker', kept in the results database so workers merge into one store
+WORK_ITEM_SCHEMA = """
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    problem_id TEXT NOT NULL,
+    run_id TEXT,
+    payload TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    state TEXT,
+    error TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    UNIQUE (kind, problem_id)
+"""
+WORK_KINDS = ("generate", "evaluate")
+
+ENGINEERING_PROMPT = """You are a senior mechanical engineering consultant with 20+ years
+of experience and deep expertise in TRIZ methodology. Your specialty is finding cross-domain
+solutions — identifying mechanisms from unrelated industries that can solve novel engineering challenges.
+
+Provide a comprehensive engineering research report:
+
+## 1. Problem Analysis
+- Core engineering contradiction
+- Key constraints and success metrics
+- Relevant TRIZ principles
+
+## 2. Solution Concepts (6-10)
+For each: Name, Mechanism (specific), Source Domain, Feasibility (H/M/L), Key Risks, First Test
+
+## 3. Cross-Domain Opportunities
+2-3 solutions from unrelated industries with explanation of the analogy
+
+## 4. Recommendations
+Top 2-3 to pursue, resources needed, 90-day timeline
+
+Be specific, cite real examples, acknowledge uncertainty."""
+
+EVALUATION_TOOL = {
+    "name": "submit_evaluation",
+    "description": "Submit structured evaluation with detailed scoring rationale",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "sparlo_scores": {
+                "type": "object",
+                "properties": {
+                    "understanding": {"type": "integer", "minimum": 1, "maximum": 10},
+                    "novelty": {"type": "integer", "minimum": 1, "maximum": 10},
+                    "relevance": {"type": "integer", "minimum": 1, "maximum": 10},
+                    "credibility": {"type": "integer", "minimum": 1, "maximum": 10},
+                    "actionability": {"type": "integer", "minimum": 1, "maximum": 10},
+                    "citations": {"type": "integer", "minimum": 1, "maximum": 10}
+                },
+                "required": ["understanding", "novelty", "relevance", "credibility", "actionability", "citations"]
+            },
+            "claude_scores": {
+                "type": "object",
+                "properties": {
+                    "understanding": {"type": "integer", "minimum": 1, "maximum": 10},
+                    "novelty": {"type": "integer", "minimum": 1, "maximum": 10},
+                    "relevance": {"type": "integer", "minimum": 1, "maximum": 10},
+                    "credibility": {"type": "integer", "minimum": 1, "maximum": 10},
+                    "actionability": {"type": "integer", "minimum": 1, "maximum": 10},
+                    "citations": {"type": "integer", "minimum": 1, "maximum": 10}
+                },
+                "required": ["understanding", "novelty", "relevance", "credibility", "actionability", "citations"]
+            },
+            "scoring_rationale": {
+                "type": "object",
+                "description": "Detailed per-dimension analysis with quotes and evidence",
+                "properties": {
+                    "understanding": {"type": "string", "description": "Analysis of how each output identified the core contradiction, with specific quotes"},
+                    "novelty": {"type": "string", "description": "Analysis of unique insights surfaced, with specific quotes from each output"},
+                    "relevance": {"type": "string", "description": "Analysis of practical applicability of solutions proposed"},
+                    "credibility": {"type": "string", "description": "Analysis of technical depth and whether an engineer would take it seriously"},
+                    "actionability": {"type": "string", "description": "Analysis of whether solutions can be pursued with information given"},
+                    "citations": {"type": "string", "description": "Analysis of citation quality - patents, papers, named researchers vs generic references"}
+                },
+                "required": ["understanding", "novelty", "relevance", "credibility", "actionability", "citations"]
+            },
+            "winner": {"type": "string", "enum": ["Sparlo", "Claude", "Tie"]},
+            "sparlo_strengths": {"type": "string", "description": "Key strengths of Sparlo output with specific examples"},
+            "claude_strengths": {"type": "string", "description": "Key strengths of Claude output with specific examples"},
+            "key_insight": {"type": "string", "description": "The single most important differentiator between the outputs"},
+            "cross_domain_sparlo": {"type": "integer", "description": "Count of cross-domain solutions in Sparlo output"},
+            "cross_domain_claude": {"type": "integer", "description": "Count of cross-domain solutions in Claude output"},
+            "cross_domain_list_sparlo": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "List of cross-domain sources cited by Sparlo (e.g., 'Laboratory hot plate stirrers', 'Medical blood warmers')"
+            },
+            "cross_domain_list_claude": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "List of cross-domain sources cited by Claude"
+            },
+            "would_pay_for_sparlo": {"type": "boolean", "description": "Would you pay $50+ for the Sparlo report?"},
+            "would_pay_rationale": {"type": "string", "description": "Justification for would_pay decision - what specific value justifies (or doesn't justify) the cost"},
+            "verdict_summary": {"type": "string", "description": "2-4 sentence summary of why the winner won, citing specific evidence"},
+            "notes": {"type": "string"}
+        },
+        "required": ["sparlo_scores", "claude_scores", "scoring_rationale", "winner", "sparlo_strengths",
+                     "claude_strengths", "key_insight", "cross_domain_sparlo", "cross_domain_claude",
+                     "cross_domain_list_sparlo", "cross_domain_list_claude",
+                     "would_pay_for_sparlo", "would_pay_rationale", "verdict_summary"]
+    }
+}
+
+# Judge instructions: identical for every row, so together with EVALUATION_TOOL they form a
+# stable prefix. It is about 2.5K tokens, under the 4096-token minimum Opus 4.5 caches, so it
+# is not marked with cache_control. Per-row content goes in the user message.
+JUDGE_RUBRIC = """You are an expert engineering consultant evaluating two research outputs for the same problem.
+Your evaluation must be thorough, evidence-based, and include specific quotes from each output.
+The problem, its metadata and both outputs are given in the user message.
+
+EVALUATION CRITERIA (Score 1-10 for each dimension):
+
+1. **Understanding** - Did it correctly identify the core engineering contradiction?
+   - Look for: Physics-based reframing, first-principles analysis, identification of what's actually impossible vs difficult
+   - Quote specific passages that show depth of understanding
+
+2. **Novelty** - Did it surface ideas the user wouldn't easily find themselves?
+   - Look for: Cross-domain transfers, academic citations, "someone already solved this" insights
+   - Identify the single most novel contribution from each output
+
+3. **Relevance** - Are the solutions actually applicable to the stated problem?
+   - Look for: Solutions that address the specific constraints, not generic advice
+   - Assess whether recommendations match the problem's scale and context
+
+4. **Credibility** - Would an experienced engineer take this seriously?
+   - Look for: Accurate physics, realistic feasibility assessments, acknowledgment of uncertainty
+   - Flag any claims that seem dubious or unsupported
+
+5. **Actionability** - Can the user pursue these solutions with the information given?
+   - Look for: Specific next steps, validation experiments, cost estimates, timelines
+   - Identify the clearest "what to do Monday morning" guidance
+
+6. **Citations** - Are references credible and verifiable?
+   - Look for: Patent numbers, academic papers, named researchers, specific products
+   - Generic references ("studies show") score lower than specific citations
+
+CROSS-DOMAIN ANALYSIS:
+- Count distinct cross-domain sources in each output (different industries, fields, or applications)
+- List each cross-domain source explicitly (e.g., "Medical blood warmers", "Aerospace thermal management")
+
+WOULD PAY $50+ ASSESSMENT:
+Consider: Does this output provide value beyond what a senior engineer could produce with 2 hours of research?
+- Killer citations that de-risk technical approaches
+- Novel insights that reframe the problem
+- Actionable IP analysis or patent landscape review
+- Strategic recommendations with evidence
+
+VERDICT:
+Determine winner based on total scores and provide a 2-4 sentence summary explaining WHY the winner won, citing specific evidence from the outputs.
+
+Use the submit_evaluation tool with your complete analysis."""
+
+
+def shared_tls_adapter(ssl_context: "ssl.SSLContext", **kwargs):
+    """A requests HTTPAdapter whose connection pools all use one shared SSL context."""
+    from requests.adapters import HTTPAdapter
+
+    class SharedTLSAdapter(HTTPAdapter):
+        def __init__(self, **kwargs):
+            self.ssl_context = ssl_context
+            super().__init__(**kwargs)
+
+        def init_poolmanager(self, *args, **kwargs):
+            kwargs["ssl_context"] = self.ssl_context
+            return super().init_poolmanager(*args, **kwargs)
+
+    return SharedTLSAdapter(**kwargs)
+
+
+class RateLimiter:
+    """Token bucket for Anthropic requests, shared by every worker thread.
+
+    Starts at ANTHROPIC_RPM and is corrected from the anthropic-ratelimit-* response
+    headers: the bucket never holds more than the server says remains, and when any
+    limit is exhausted (or a retry-after is received) all workers wait until it resets.
+    """
+
+    def __init__(self, requests_per_minute: int = ANTHROPIC_RPM):
+        self.capacity = float(requests_per_minute)
+        self.tokens = float(requests_per_minute)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = max(self.blocked_until - now, (1 - self.tokens) * 60 / self.capacity)
+            time.sleep(wait_for)
+
+    def block_for(self, seconds: float):
+        """Hold every worker back for the given number of seconds."""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def update(self, headers):
+        """Correct the bucket from anthropic-ratelimit-* response headers."""
+        limit = headers.get("anthropic-ratelimit-requests-limit")
+        remaining = headers.get("anthropic-ratelimit-requests-remaining")
+        with self.lock:
+            if limit:
+                self.capacity = float(limit)
+            if remaining is not None:
+                self.tokens = min(self.tokens, float(remaining))
+
+        for kind in ("requests", "tokens", "input-tokens", "output-tokens"):
+            if headers.get(f"anthropic-ratelimit-{kind}-remaining") != "0":
+                continue
+            reset = headers.get(f"anthropic-ratelimit-{kind}-reset")
+            if reset:
+                reset_at = datetime.fromisoformat(reset.replace("Z", "+00:00"))
+                self.block_for((reset_at - datetime.now(timezone.utc)).total_seconds())
+
+
+# Shared clients, created on first use and reused for the whole run
+_clients = {"pool_size": DEFAULT_POOL_SIZE, "ssl_context": None, "http": None, "anthropic": None,
+            "limiter": None}
+_client_stats = {"sparlo_requests": 0, "anthropic_requests": 0}
+_client_lock = threading.Lock()
+
+
+def configure_clients(pool_size: int):
+    """Size the shared connection pools. Call before the first request of a run."""
+    with _client_lock:
+        _clients["pool_size"] = max(pool_size, 1)
+        _clients["http"] = None
+        _clients["anthropic"] = None
+
+
+def _shared_ssl_context() -> "ssl.SSLContext":
+    import ssl
+
+    # One context for every connection, so CA certificates are loaded once per run
+    if _clients["ssl_context"] is None:
+        _clients["ssl_context"] = ssl.create_default_context()
+    return _clients["ssl_context"]
+
+
+def _count_request(key: str):
+    with _client_lock:
+        _client_stats[key] += 1
+
+
+def get_http_session() -> "requests.Session":
+    """Return the shared keep-alive Session used for all Sparlo API calls."""
+    import requests
+
+    with _client_lock:
+        if _clients["http"] is None:
+            session = requests.Session()
+            adapter = shared_tls_adapter(
+                _shared_ssl_context(),
+                pool_connections=_clients["pool_size"],
+                pool_maxsize=_clients["pool_size"]
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.hooks["response"].append(lambda resp, *args, **kwargs: _count_request("sparlo_requests"))
+            _clients["http"] = session
+        return _clients["http"]
+
+
+def get_anthropic_client() -> "Anthropic":
+    """Return the shared Anthropic client used for all Claude calls.
+
+    SDK retries are off; create_message retries through the shared rate limiter instead.
+    """
+    import httpx
+    from anthropic import Anthropic, DefaultHttpxClient
+
+    with _client_lock:
+        if _clients["anthropic"] is None:
+            pool_size = _clients["pool_size"]
+            http_client = DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                verify=_shared_ssl_context(),
+                event_hooks={"response": [lambda resp: _count_request("anthropic_requests")]}
+            )
+            _clients["anthropic"] = Anthropic(api_key=ANTHROPIC_KEY, http_client=http_client, max_retries=0)
+        return _clients["anthropic"]
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide Anthropic rate limiter."""
+    with _client_lock:
+        if _clients["limiter"] is None:
+            _clients["limiter"] = RateLimiter()
+        return _clients["limiter"]
+
+
+def create_message(**params):
+    """Send a Messages API request through the shared rate limiter.
+
+    429/529 (and transient 5xx/connection) failures are retried with jittered
+    exponential backoff, waiting at least as long as any retry-after header asks.
+    """
+    import random
+
+    from anthropic import APIConnectionError, APIStatusError
+
+    client = get_anthropic_client()
+    limiter = get_rate_limiter()
+
+    for attempt in range(ANTHROPIC_MAX_RETRIES + 1):
+        limiter.acquire()
+        try:
+            raw = client.messages.with_raw_response.create(**params)
+        except (APIStatusError, APIConnectionError) as e:
+            if attempt == ANTHROPIC_MAX_RETRIES:
+                raise
+            if isinstance(e, APIStatusError) and e.status_code not in ANTHROPIC_RETRY_STATUS:
+                raise
+
+            delay = random.uniform(0, min(2 ** attempt, 60))
+            if isinstance(e, APIStatusError):
+                limiter.update(e.response.headers)
+                retry_after = e.response.headers.get("retry-after")
+                if retry_after:
+                    delay += float(retry_after)
+                if e.status_code in (429, 529):
+                    limiter.block_for(delay)
+            time.sleep(delay)
+            continue
+
+        limiter.update(raw.headers)
+        return raw.parse()
+
+
+def stream_message(params: dict, partial_path: Path = None) -> tuple[str, dict]:
+    """Stream a Messages API response, appending text to partial_path as it arrives.
+
+    Returns (text, timing) with ttft_sec, tokens_per_sec, output_tokens and usage. A response
+    cut off mid-stream is resumed by prefilling the text received so far, and so is
+    text left in partial_path by an interrupted run. Retries follow create_message.
+    tokens_per_sec and output_tokens describe the attempt that finished; usage totals all of them.
+    """
+    import random
+
+    import httpx
+    from anthropic import APIConnectionError, APIStatusError
+
+    client = get_anthropic_client()
+    limiter = get_rate_limiter()
+    text = partial_path.read_text() if partial_path and partial_path.exists() else ""
+    start = time.time()
+    ttft = None
+    output_tokens = 0
+    generating = 0
+    usage = {"input": 0, "output": 0, "cache_read": 0, "cache_write": 0}
+
+    for attempt in range(ANTHROPIC_MAX_RETRIES + 1):
+        request = dict(params)
+        # The API rejects prefills ending in whitespace; the model regenerates it
+        text = text.rstrip()
+        if text:
+            request["messages"] = params["messages"] + [{"role": "assistant", "content": text}]
+        if partial_path:
+            partial_path.write_text(text)
+
+        limiter.acquire()
+        first_chunk = None
+        try:
+            with client.messages.stream(**request) as stream:
+                limiter.update(stream.response.headers)
+                with open(partial_path, 'a') if partial_path else open(os.devnull, 'w') as f:
+                    for chunk in stream.text_stream:
+                        if first_chunk is None:
+                            first_chunk = time.time()
+                        if ttft is None:
+                            ttft = first_chunk - start
+                        text += chunk
+                        f.write(chunk)
+                        f.flush()
+                message = stream.get_final_message()
+            # Every attempt, including a cut-off one, is billed for what it used
+            for kind, count in usage_counts(message.usage).items():
+                usage[kind] += count
+            if message.stop_reason is None:
+                raise httpx.RemoteProtocolError("stream closed before message_stop")
+            # Throughput covers the attempt that finished: its tokens over its own generation time
+            output_tokens = message.usage.output_tokens
+            generating = time.time() - first_chunk if first_chunk else 0
+            break
+        except (APIStatusError, APIConnectionError, httpx.TransportError) as e:
+            # An error event mid-stream arrives with the 200 status of the stream itself
+            status = getattr(e, "status_code", None)
+            if attempt == ANTHROPIC_MAX_RETRIES or (status is not None and status not in ANTHROPIC_RETRY_STATUS + (200,)):
+                raise
+
+            delay = random.uniform(0, min(2 ** attempt, 60))
+            if isinstance(e, APIStatusError) and status != 200:
+                limiter.update(e.response.headers)
+                retry_after = e.response.headers.get("retry-after")
+                if retry_after:
+                    delay += float(retry_after)
+                if status in (429, 529):
+                    limiter.block_for(delay)
+            time.sleep(delay)
+
+    timing = {
+        "ttft_sec": ttft,
+        "tokens_per_sec": output_tokens / generating if generating > 0 else None,
+        "output_tokens": output_tokens,
+        "usage": usage
+    }
+    return (text, timing)
+
+
+def submit_message_batches(requests):
+    """Submit (custom_id, params) pairs as Message Batches, yielding (batch_id, custom_ids) per batch.
+
+    Requests are split only where a single batch would exceed its request or size limit.
+    Each batch is yielded as soon as it is created so the caller can record it.
+    """
+    client = get_anthropic_client()
+    chunk, size = [], 0
+    for custom_id, params in requests:
+        request = {"custom_id": custom_id, "params": params}
+        request_size = len(json.dumps(request))
+        if chunk and (len(chunk) == BATCH_MAX_REQUESTS or size + request_size > BATCH_MAX_BYTES):
+            yield (client.messages.batches.create(requests=chunk).id, [r["custom_id"] for r in chunk])
+            chunk, size = [], 0
+        chunk.append(request)
+        size += request_size
+    if chunk:
+        yield (client.messages.batches.create(requests=chunk).id, [r["custom_id"] for r in chunk])
+
+
+def wait_for_message_batch(batch_id: str, label: str = "Batch"):
+    """Poll a Message Batch until it has ended, reporting its request counts."""
+    client = get_anthropic_client()
+    with span("anthropic.batch", batch_id=batch_id, label=label):
+        while True:
+            batch = client.messages.batches.retrieve(batch_id)
+            counts = batch.request_counts
+            if batch.processing_status == "ended":
+                click.echo(f"  {label} {batch_id} ended: {counts.succeeded} succeeded, {counts.errored} errored, "
+                           f"{counts.expired} expired, {counts.canceled} canceled")
+                return
+            click.echo(f"  {label} {batch_id} {batch.processing_status}: {counts.processing} processing, "
+                       f"{counts.succeeded + counts.errored + counts.expired + counts.canceled} done")
+            time.sleep(BATCH_POLL_INTERVAL)
+
+
+def message_batch_results(batch_id: str):
+    """Yield (custom_id, message, error) for each request of an ended Message Batch."""
+    client = get_anthropic_client()
+    for entry in client.messages.batches.results(batch_id):
+        result = entry.result
+        if result.type == "succeeded":
+            yield (entry.custom_id, result.message, None)
+        elif result.type == "errored":
+            yield (entry.custom_id, None, f"{result.error.error.type}: {result.error.error.message}")
+        else:
+            yield (entry.custom_id, None, result.type)
+
+
+def save_batch_record(record: dict):
+    """Write a submitted batch's record to BATCHES_DIR/{batch_id}.json (temp file + rename)."""
+    BATCHES_DIR.mkdir(exist_ok=True)
+    path = BATCHES_DIR / f"{record['batch_id']}.json"
+    tmp_file = path.with_suffix('.json.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_file, path)
+
+
+def pending_batch_records(kind: str) -> list[dict]:
+    """Records of submitted batches of a kind whose results have not been collected yet."""
+    records = []
+    for path in sorted(BATCHES_DIR.glob("*.json")):
+        with open(path, 'r') as f:
+            record = json.load(f)
+        if record['kind'] == kind and not record.get('collected_at'):
+            records.append(record)
+    return records
+
+
+def client_stats() -> dict:
+    """Request and connection counts for the shared clients."""
+    stats = dict(_client_stats, pool_size=_clients["pool_size"], sparlo_connections=0, anthropic_connections=0)
+
+    session = _clients["http"]
+    if session is not None:
+        for adapter in set(session.adapters.values()):
+            for key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is not None:
+                    stats["sparlo_connections"] += pool.num_connections
+
+    client = _clients["anthropic"]
+    if client is not None:
+        # httpx does not expose pool counters publicly; read them from the transport when available
+        pool = getattr(getattr(client._client, "_transport", None), "_pool", None)
+        stats["anthropic_connections"] = len(getattr(pool, "connections", []))
+
+    return stats
+
+
+def echo_client_stats():
+    """Print a one-line summary of connection reuse for this run."""
+    stats = client_stats()
+    click.echo(
+        f"Connections: Sparlo {stats['sparlo_requests']} requests over {stats['sparlo_connections']} connections, "
+        f"Anthropic {stats['anthropic_requests']} requests over {stats['anthropic_connections']} open "
+        f"(pool size {stats['pool_size']})"
+    )
+
+
+_trace = {"run_id": None, "file": None}
+_trace_lock = threading.Lock()
+
+
+def record_span(name: str, start: float, duration: float, **attrs):
+    """Append one timed stage to TRACE_FILE, tagged with the current run id and thread."""
+    line = json.dumps({
+        "run": _trace["run_id"],
+        "span": name,
+        "start": round(start, 3),
+        "duration": round(duration, 4),
+        "thread": threading.current_thread().name,
+        **attrs
+    }, default=str)
+    with _trace_lock:
+        if _trace["file"] is None:
+            _trace["file"] = open(TRACE_FILE, 'a', buffering=1)  # Line buffered: spans survive a crash
+        _trace["file"].write(line + "\n")
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time the enclosed block as a trace span.
+
+    The yielded dict can be updated with attributes only known at the end (e.g. status);
+    an exception is recorded as the span's error and re-raised.
+    """
+    start = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs.setdefault("error", f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        record_span(name, start, time.perf_counter() - t0, **attrs)
+
+
+def store_blob(text: str) -> tuple[str, str]:
+    """Store text gzipped under BLOBS_DIR by its SHA-256. Returns (sha256, path)."""
+    import gzip
+    import hashlib
+
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    path = BLOBS_DIR / digest[:2] / f"{digest}.txt.gz"
+    if not path.exists():
+        with span("blob.write", bytes=len(text)):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+    return (digest, str(path))
+
+
+def load_blob(path: str) -> str:
+    import gzip
+
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+def load_output(row: dict, side: str) -> str:
+    """Load a row's 'sparlo' or 'claude' output body from its blob ('' if none)."""
+    path = row.get(f"{side}_output_path")
+    return load_blob(path) if path else ""
+
+
+def report_file(problem_id: str, kind: str, reports_dir: Path = REPORTS_DIR) -> Path:
+    """Path of reports/{problem_id}_{kind}.json.gz, or the legacy uncompressed .json if that exists."""
+    legacy = Path(reports_dir) / f"{problem_id}_{kind}.json"
+    return legacy if legacy.exists() else Path(reports_dir) / f"{problem_id}_{kind}.json.gz"
+
+
+def write_report(problem_id: str, kind: str, data: dict) -> Path:
+    """Write a full 'sparlo' or 'claude' report as compact gzipped JSON. Returns the file path."""
+    import gzip
+
+    path = REPORTS_DIR / f"{problem_id}_{kind}.json.gz"
+    tmp_path = path.with_suffix(".tmp")
+    with span("report.write", problem_id=problem_id, kind=kind):
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump(data, f, separators=(',', ':'), default=str)
+        os.replace(tmp_path, path)
+    return path
+
+
+def read_report(problem_id: str, kind: str, reports_dir: Path = REPORTS_DIR) -> dict:
+    """Load a saved report (compressed or legacy), or None if it does not exist."""
+    import gzip
+
+    path = report_file(problem_id, kind, reports_dir)
+    if not path.exists():
+        return None
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+_cache = {"enabled": True, "hits": 0, "misses": 0}
+_cache_lock = threading.Lock()
+
+
+def cache_key(params: dict) -> str:
+    """SHA-256 over everything that determines a response: model, system prompt, tools, inputs."""
+    import hashlib
+
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def cache_get(params: dict) -> dict:
+    """Cached value for these request params, or None on a miss (or when caching is off)."""
+    import gzip
+
+    if not _cache["enabled"]:
+        return None
+    digest = cache_key(params)
+    path = CACHE_DIR / digest[:2] / f"{digest}.json.gz"
+    try:
+        if time.time() - path.stat().st_mtime > CACHE_MAX_AGE_DAYS * 86400:
+            raise FileNotFoundError
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            value = json.load(f)
+        os.utime(path)  # Recently used entries survive size-based eviction
+    except (OSError, json.JSONDecodeError, EOFError):
+        with _cache_lock:
+            _cache["misses"] += 1
+        return None
+    with _cache_lock:
+        _cache["hits"] += 1
+    return value
+
+
+def cache_put(params: dict, value: dict, key: str = None):
+    """Store a successful response value for these request params (or a precomputed cache key)."""
+    import gzip
+
+    if not _cache["enabled"]:
+        return
+    digest = key or cache_key(params)
+    path = CACHE_DIR / digest[:2] / f"{digest}.json.gz"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(value, f)
+    os.replace(tmp_path, path)
+
+
+def evict_cache() -> int:
+    """Delete expired entries, then least recently used ones beyond CACHE_MAX_BYTES. Returns the count."""
+    if not CACHE_DIR.exists():
+        return 0
+    cutoff = time.time() - CACHE_MAX_AGE_DAYS * 86400
+    entries = []
+    removed = 0
+    for path in CACHE_DIR.glob("*/*.json.gz"):
+        stat = path.stat()
+        if stat.st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+        else:
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= CACHE_MAX_BYTES:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+def echo_cache_stats():
+    """Print response cache hits/misses for this run and apply eviction."""
+    if not _cache["enabled"]:
+        return
+    evicted = evict_cache()
+    click.echo(f"Response cache: {_cache['hits']} hits, {_cache['misses']} misses"
+               + (f", {evicted} evicted" if evicted else ""))
+
+
+_store = {"conn": None}
+_store_lock = threading.Lock()
+
+
+def get_store() -> sqlite3.Connection:
+    """Return the shared connection to DB_FILE (WAL mode, rows as sqlite3.Row)."""
+    with _store_lock:
+        if _store["conn"] is None:
+            conn = sqlite3.connect(DB_FILE, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            _store["conn"] = conn
+        return _store["conn"]
+
+
+def summary_sql(*terms: tuple[str, str]) -> str:
+    """SET clause adding (sign, row alias) terms of every SUMMARY_COUNTERS expression to its column."""
+    return ", ".join(
+        f"{name} = {name} " + " ".join(f"{sign} {expr.format(r=alias)}" for sign, alias in terms)
+        for name, expr in SUMMARY_COUNTERS.items()
+    )
+
+
+def init_summary(conn: sqlite3.Connection):
+    """Create results_summary and its triggers, counting the existing rows once. Call inside a transaction."""
+    names = ", ".join(SUMMARY_COUNTERS)
+    columns = ", ".join(f"{name} INTEGER NOT NULL" for name in SUMMARY_COUNTERS)
+    counts = ", ".join(f"COALESCE(SUM({expr.format(r='results')}), 0)" for expr in SUMMARY_COUNTERS.values())
+    conn.execute(f"CREATE TABLE IF NOT EXISTS results_summary (id INTEGER PRIMARY KEY CHECK (id = 1), {columns})")
+    if conn.execute("SELECT 1 FROM results_summary WHERE id = 1").fetchone() is None:
+        conn.execute(f"INSERT INTO results_summary (id, {names}) SELECT 1, {counts} FROM results")
+    conn.execute("CREATE TRIGGER IF NOT EXISTS results_summary_insert AFTER INSERT ON results BEGIN "
+                 f"UPDATE results_summary SET {summary_sql(('+', 'NEW'))} WHERE id = 1; END")
+    conn.execute("CREATE TRIGGER IF NOT EXISTS results_summary_delete AFTER DELETE ON results BEGIN "
+                 f"UPDATE results_summary SET {summary_sql(('-', 'OLD'))} WHERE id = 1; END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS results_summary_update AFTER UPDATE OF {', '.join(SUMMARY_COLUMNS)} "
+                 f"ON results BEGIN UPDATE results_summary SET {summary_sql(('+', 'NEW'), ('-', 'OLD'))} "
+                 "WHERE id = 1; END")
+
+
+def read_summary() -> dict:
+    """The results_summary counters, or None if there are no results yet.
+
+    A checkout with only a legacy results.csv is migrated into a new store first.
+    """
+    if not DB_FILE.exists():
+        if not CSV_FILE.exists():
+            return None
+        init_store()
+    conn = get_store()
+    try:
+        with _store_lock:
+            row = conn.execute("SELECT * FROM results_summary WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        init_store()  # A store from before the summary table; counted once here
+        with _store_lock:
+            row = conn.execute("SELECT * FROM results_summary WHERE id = 1").fetchone()
+    return dict(row)
+
+
+def init_store():
+    """Create the results, results_summary and work_items tables, their indexes and the reports directory.
+
+    Columns added to CSV_COLUMNS later are added to an existing table. On first
+    run, an existing results.csv is migrated automatically.
+    """
+    REPORTS_DIR.mkdir(exist_ok=True)
+    created = not DB_FILE.exists()
+    conn = get_store()
+
+    columns = ", ".join(
+        f"{col} {COLUMN_TYPES.get(col, 'TEXT')}" + (" PRIMARY KEY" if col == "problem_id" else "")
+        for col in CSV_COLUMNS
+    )
+    with _store_lock, conn:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS results ({columns})")
+        existing = {r["name"] for r in conn.execute("PRAGMA table_info(results)")}
+        for col in CSV_COLUMNS:
+            if col not in existing:
+                conn.execute(f"ALTER TABLE results ADD COLUMN {col} {COLUMN_TYPES.get(col, 'TEXT')}")
+        for col in RESULT_INDEXES:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_results_{col} ON results ({col})")
+        init_summary(conn)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS work_items ({WORK_ITEM_SCHEMA})")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_work_items_status ON work_items (status, kind)")
+
+    # Older stores kept output bodies inline; move them out to blobs
+    for side in OUTPUT_SIDES:
+        if f"{side}_output" in existing:
+            externalize_column(conn, side)
+
+    if created and CSV_FILE.exists():
+        imported = migrate_csv(CSV_FILE)
+        click.echo(f"Migrated {imported} rows from {CSV_FILE} into {DB_FILE}", err=True)
+
+    # Rows stored before duplicate detection have no fingerprints yet
+    with _store_lock:
+        unhashed = conn.execute(
+            "SELECT problem_id, problem_text FROM results WHERE problem_hash IS NULL AND problem_text IS NOT NULL"
+        ).fetchall()
+    if unhashed:
+        with _store_lock, conn:
+            conn.executemany(
+                "UPDATE results SET problem_hash = ?, problem_minhash = ? WHERE problem_id = ?",
+                [(problem_hash(text), encode_minhash(problem_minhash(text)), problem_id) for problem_id, text in unhashed]
+            )
+
+    # Signatures from an older fingerprint scheme do not compare with new ones; recompute them once
+    with _store_lock:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        stale = conn.execute(
+            "SELECT problem_id, problem_text FROM results WHERE problem_text IS NOT NULL"
+        ).fetchall() if version < FINGERPRINT_VERSION else []
+    if version < FINGERPRINT_VERSION:
+        with _store_lock, conn:
+            conn.executemany("UPDATE results SET problem_minhash = ? WHERE problem_id = ?",
+                             [(encode_minhash(problem_minhash(text)), problem_id) for problem_id, text in stale])
+            conn.execute(f"PRAGMA user_version = {FINGERPRINT_VERSION}")
+
+
+def externalize_column(conn: sqlite3.Connection, side: str):
+    """Move a legacy inline {side}_output column into blobs and drop it."""
+    with _store_lock:
+        inline = conn.execute(
+            f"SELECT problem_id, {side}_output FROM results WHERE {side}_output IS NOT NULL AND {side}_output != ''"
+        ).fetchall()
+    for problem_id, text in inline:
+        digest, path = store_blob(text)
+        with _store_lock, conn:
+            conn.execute(
+                f"UPDATE results SET {side}_output_sha256 = ?, {side}_output_path = ?, {side}_output = NULL WHERE problem_id = ?",
+                (digest, path, problem_id)
+            )
+    with _store_lock, conn:
+        conn.execute(f"ALTER TABLE results DROP COLUMN {side}_output")
+
+
+def insert_result(row: dict) -> bool:
+    """Insert a new results row. Returns False if the problem_id is already stored.
+
+    Inline 'sparlo_output' / 'claude_output' text is moved to blobs and replaced by references,
+    and the problem text is fingerprinted for duplicate detection.
+    """
+    row = dict(row)
+    if row.get('problem_text') and not row.get('problem_hash'):
+        row['problem_hash'] = problem_hash(row['problem_text'])
+        row['problem_minhash'] = encode_minhash(problem_minhash(row['problem_text']))
+    for side in OUTPUT_SIDES:
+        text = row.pop(f"{side}_output", None)
+        if text:
+            row[f"{side}_output_sha256"], row[f"{side}_output_path"] = store_blob(str(text))
+    values = [None if row.get(col) == '' else row.get(col) for col in CSV_COLUMNS]
+    conn = get_store()
+    with span("store.insert", problem_id=row.get('problem_id')), _store_lock, conn:
+        cur = conn.execute(
+            f"INSERT OR IGNORE INTO results ({', '.join(CSV_COLUMNS)}) VALUES ({', '.join('?' * len(CSV_COLUMNS))})",
+            values
+        )
+    return cur.rowcount == 1
+
+
+def read_results(where: str = "1", params: tuple = (), columns: list = None) -> list[dict]:
+    """Rows matching a SQL condition, as dicts in insertion order."""
+    cols = ", ".join(columns) if columns else "*"
+    conn = get_store()
+    with _store_lock:
+        cur = conn.execute(f"SELECT {cols} FROM results WHERE {where} ORDER BY rowid", params)
+        return [dict(r) for r in cur.fetchall()]
+
+
+def count_winners() -> dict:
+    """Number of evaluated rows won by each side ('Sparlo', 'Claude', 'Tie')."""
+    conn = get_store()
+    with _store_lock:
+        rows = conn.execute(
+            "SELECT winner, COUNT(*) FROM results WHERE evaluated = 'true' GROUP BY winner"
+        ).fetchall()
+    return dict({"Sparlo": 0, "Claude": 0, "Tie": 0}, **{w: n for w, n in rows if w})
+
+
+def result_exists(problem_id: str) -> bool:
+    conn = get_store()
+    with _store_lock:
+        return conn.execute("SELECT 1 FROM results WHERE problem_id = ?", (problem_id,)).fetchone() is not None
+
+
+def commit_evaluation(row: dict):
+    """Durably store a finished evaluation before moving on to the next one."""
+    conn = get_store()
+    with span("store.commit", problem_id=row['problem_id']), _store_lock, conn:
+        conn.execute(
+            f"UPDATE results SET {', '.join(f'{col} = ?' for col in EVALUATION_COLUMNS)} WHERE problem_id = ?",
+            [row.get(col) for col in EVALUATION_COLUMNS] + [row['problem_id']]
+        )
+
+
+def read_journal() -> dict:
+    """Evaluations from a legacy evaluations.jsonl by problem_id (last entry wins)."""
+    evaluations = {}
+    if not JOURNAL_FILE.exists():
+        return evaluations
+    with open(JOURNAL_FILE, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partial write from a crash mid-append
+            evaluations[entry["problem_id"]] = entry["fields"]
+    return evaluations
+
+
+def migrate_csv(csv_path: Path) -> int:
+    """Import rows from a results CSV (plus any evaluations.jsonl) that are not stored yet."""
+    import csv
+
+    csv.field_size_limit(sys.maxsize)  # Inline report outputs exceed the default limit
+    evaluations = read_journal()
+    imported = 0
+    with open(csv_path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            row.update(evaluations.get(row['problem_id'], {}))
+            if insert_result(row):
+                imported += 1
+            elif row['problem_id'] in evaluations:
+                commit_evaluation(row)
+    return imported
+
+
+def export_csv(csv_path: Path, inline_outputs: bool = True) -> int:
+    """Write every stored row to a CSV via an atomic temp-file rename. Returns the row count.
+
+    With inline_outputs, output bodies are loaded one row at a time and written under
+    the original sparlo_output / claude_output columns; otherwise references are written.
+    """
+    import csv
+
+    tmp_file = csv_path.with_suffix('.csv.tmp')
+    count = 0
+    conn = get_store()
+    with _store_lock:
+        rows = conn.execute(f"SELECT {', '.join(CSV_COLUMNS)} FROM results ORDER BY rowid").fetchall()
+    with span("csv.write", path=str(csv_path)) as attrs, open(tmp_file, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=EXPORT_COLUMNS if inline_outputs else CSV_COLUMNS)
+        writer.writeheader()
+        for r in rows:
+            row = dict(r)
+            if inline_outputs:
+                for side in OUTPUT_SIDES:
+                    row[f"{side}_output"] = load_output(row, side)
+                    del row[f"{side}_output_sha256"], row[f"{side}_output_path"]
+                del row["problem_minhash"]
+            writer.writerow(row)
+            count += 1
+        attrs["rows"] = count
+    os.replace(tmp_file, csv_path)
+    return count
+
+
+# Problem fingerprints: an exact hash of the normalized text, plus a MinHash signature over
+# word 3-gram shingles whose agreement rate estimates Jaccard similarity between problems.
+# Each shingle's SHAKE-128 output supplies one 64-bit hash per permutation. Stores whose
+# user_version is below FINGERPRINT_VERSION hold signatures from an older scheme.
+FINGERPRINT_VERSION = 2
+_MINHASH_STRUCT = struct.Struct(f">{MINHASH_PERMUTATIONS}Q")
+
+
+def normalize_problem(text: str) -> str:
+    """Lowercased problem text with whitespace collapsed."""
+    return " ".join(text.lower().split())
+
+
+def problem_hash(text: str) -> str:
+    import hashlib
+
+    return hashlib.sha256(normalize_problem(text).encode()).hexdigest()
+
+def problem_minhash(text: str) -> list[int]:
+    """MinHash signature of the problem's word 3-gram shingles."""
+    import hashlib
+
+    words = normalize_problem(text).split() or [""]
+    shingles = {" ".join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))}
+    hashes = [_MINHASH_STRUCT.unpack(hashlib.shake_128(sh.encode()).digest(_MINHASH_STRUCT.size)) for sh in shingles]
+    return list(map(min, zip(*hashes)))
+
+
+def encode_minhash(signature: list[int]) -> str:
+    return "".join(f"{v:016x}" for v in signature)
+
+
+def decode_minhash(encoded: str) -> list[int]:
+    return [int(encoded[i:i + 16], 16) for i in range(0, len(encoded), 16)]
+
+
+class ProblemIndex:
+    """Exact and near-duplicate lookup of problem text (MinHash + LSH banding).
+
+    Built from every stored row; problems added during a run are indexed too, so
+    repeats within one problems file are caught as well.
+    """
+
+    def __init__(self, threshold: float = DUPLICATE_SIMILARITY):
+        self.threshold = threshold
+        self.rows_per_band = MINHASH_PERMUTATIONS // LSH_BANDS
+        self.exact = {}       # problem_hash -> problem_id
+        self.signatures = {}  # problem_id -> signature
+        self.buckets = {}     # (band, band values) -> [problem_id, ...]
+
+    @classmethod
+    def from_store(cls, threshold: float = DUPLICATE_SIMILARITY) -> "ProblemIndex":
+        index = cls(threshold)
+        for row in read_results("problem_hash IS NOT NULL", columns=["problem_id", "problem_hash", "problem_minhash"]):
+            index.add(row['problem_id'], row['problem_hash'], decode_minhash(row['problem_minhash']))
+        return index
+
+    def _bands(self, signature: list[int]):
+        r = self.rows_per_band
+        for band in range(LSH_BANDS):
+            yield (band, tuple(signature[band * r:(band + 1) * r]))
+
+    def add(self, problem_id: str, digest: str, signature: list[int]):
+        self.exact.setdefault(digest, problem_id)
+        self.signatures[problem_id] = signature
+        for key in self._bands(signature):
+            self.buckets.setdefault(key, []).append(problem_id)
+
+    def add_text(self, problem_id: str, text: str):
+        self.add(problem_id, problem_hash(text), problem_minhash(text))
+
+    def find(self, text: str) -> tuple[str, float]:
+        """(problem_id, estimated similarity) of the closest indexed problem above the threshold."""
+        digest = problem_hash(text)
+        if digest in self.exact:
+            return (self.exact[digest], 1.0)
+        signature = problem_minhash(text)
+        candidates = {pid for key in self._bands(signature) for pid in self.buckets.get(key, ())}
+        best = None
+        for pid in candidates:
+            similarity = sum(a == b for a, b in zip(signature, self.signatures[pid])) / MINHASH_PERMUTATIONS
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (pid, similarity)
+        return best
+
+
+def find_stored_duplicate(text: str) -> str:
+    """problem_id of a stored row with exactly the same (normalized) problem text."""
+    rows = read_results("problem_hash = ?", (problem_hash(text),), columns=["problem_id"])
+    return rows[0]['problem_id'] if rows else None
+
+
+def reuse_result(source_id: str, row: dict, similarity: float) -> str:
+    """Store row as a new result linked to source_id's outputs instead of regenerating them.
+
+    Output blobs are content addressed, so the new row simply references the same ones.
+    Returns None if the source row has no complete outputs to reuse.
+    """
+    source = read_results("problem_id = ?", (source_id,))
+    if not source or source[0]['sparlo_status'] != 'complete' or source[0]['claude_status'] != 'complete':
+        return None
+    source = source[0]
+    for col in ("sparlo_output_sha256", "sparlo_output_path", "claude_output_sha256", "claude_output_path",
+                "sparlo_status", "claude_status", "sparlo_time_sec", "claude_time_sec",
+                "claude_ttft_sec", "claude_tokens_per_sec", "sparlo_step_seconds"):
+        row[col] = source[col]
+    match = "exact duplicate" if similarity >= 1.0 else f"near-duplicate, similarity {similarity:.2f}"
+    row['notes'] = f"Reused outputs of {source_id} ({match})"
+    row['evaluated'] = "false"
+    insert_result(row)
+    return row['problem_id']
+
+
+def duplicate_of(problem_text: str, index: ProblemIndex = None) -> tuple[str, float]:
+    """(problem_id, similarity) of a known duplicate problem.
+
+    Uses the near-duplicate index when one is given, otherwise only exact matches in the store.
+    """
+    if index is not None:
+        return index.find(problem_text)
+    source_id = find_stored_duplicate(problem_text)
+    return (source_id, 1.0) if source_id else None
+
+
+def run_sparlo(problem_text: str, problem_id: str = None, timeline: list = None, report_id: str = None,
+               started_at: float = None, heartbeat=None) -> tuple[str, str, float, dict]:
+    """Call Sparlo benchmark API and poll until complete. Returns (output, status, duration, full_json).
+
+    Step transitions seen while polling are appended to timeline when one is given.
+    With report_id (and its started_at), polls an existing report instead of
+    creating one. heartbeat(report_id, started_at) is called once the report
+    exists and after every poll; it may raise to stop polling.
+    """
+    start = started_at or time.time()
+
+    if not BENCHMARK_API_KEY:
+        click.echo("  ERROR: BENCHMARK_API_KEY not set in .env")
+        return ("", "error", 0, {})
+
+    if report_id:
+        click.echo(f"  Reattaching to Sparlo report {report_id}")
+    else:
+        # Create report via benchmark endpoint, waiting out a busy deployment
+        report_id, error, retry_after = start_sparlo_report(problem_text, problem_id)
+        for failures in range(1, SPARLO_SUBMIT_RETRIES + 1):
+            if not error or retry_after is None:
+                break
+            delay = submit_backoff(failures, retry_after)
+            click.echo(f"  Sparlo busy ({error[:40]}), retrying in {delay:.0f}s")
+            time.sleep(delay)
+            report_id, error, retry_after = start_sparlo_report(problem_text, problem_id)
+        if error:
+            click.echo(f"  ERROR: Failed to create report: {error}")
+            return ("", "error", time.time() - start, {})
+
+        click.echo(f"  Sparlo report created: {report_id}")
+    if heartbeat:
+        heartbeat(report_id, start)
+
+    # Poll until complete (up to SPARLO_DEADLINE_SEC), spacing polls by reported progress
+    scheduler = PollScheduler()
+    scheduler.add(report_id, start)
+
+    while scheduler.pending():
+        _, delay = scheduler.next_poll()
+        if time.time() + delay - start >= SPARLO_DEADLINE_SEC:
+            break
+        time.sleep(delay)
+
+        output, status, report_data, progress = poll_sparlo_report(report_id, problem_id, problem_text, start, timeline)
+        scheduler.record(report_id, status, progress)
+        if heartbeat:
+            heartbeat(report_id, start)
+
+        if status == "poll_error":
+            click.echo("  ERROR: Failed to get status, backing off")
+            continue
+
+        click.echo(f"  Sparlo: {status} - {progress['step']} ({progress['progress']}%)")
+
+        if status == "complete":
+            if problem_id:
+                click.echo(f"  Saved full report to {report_file(problem_id, 'sparlo')}")
+            record_span("sparlo.report", start, time.time() - start, problem_id=problem_id, status="complete")
+            return (output, "complete", time.time() - start, report_data)
+        elif status == "error":
+            record_span("sparlo.report", start, time.time() - start, problem_id=problem_id, status="error")
+            return ("", "error", time.time() - start, {})
+
+    record_span("sparlo.report", start, time.time() - start, problem_id=problem_id, status="timeout")
+    return ("", "timeout", time.time() - start, {})
+
+
+def claude_params(problem_text: str) -> dict:
+    """Messages API params for the Claude contender report."""
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": 8192,
+        "system": ENGINEERING_PROMPT,
+        "messages": [{"role": "user", "content": problem_text}]
+    }
+
+
+def cached_timing(cached: dict) -> dict:
+    """Timing of a cached contender response; its usage was billed to the original call."""
+    return {k: v for k, v in cached.get("timing", {}).items() if k != "usage"}
+
+
+def run_claude(problem_text: str, problem_id: str = None, stream: bool = False) -> tuple[str, str, float, dict]:
+    """Call Claude API for engineering report. Returns (output, status, duration, timing).
+
+    timing holds ttft_sec (streaming only), tokens_per_sec, output_tokens and usage. With stream,
+    text is written to reports/{problem_id}_claude.partial.txt as it arrives; the file is
+    kept if the call fails so a later run resumes from it, and removed on success.
+    A cached response returns the duration and timing of the original call, without usage.
+    """
+    start = time.time()
+    params = claude_params(problem_text)
+
+    cached = cache_get(params)
+    if cached:
+        return (cached["text"], "complete", cached["duration"], cached_timing(cached))
+
+    partial_path = REPORTS_DIR / f"{problem_id}_claude.partial.txt" if problem_id else None
+    try:
+        with span("claude.generate", problem_id=problem_id, stream=stream):
+            if stream:
+                text, timing = stream_message(params, partial_path)
+            else:
+                response = create_message(**params)
+                text = response.content[0].text
+                timing = {"ttft_sec": None, "output_tokens": response.usage.output_tokens,
+                          "usage": usage_counts(response.usage)}
+        duration = time.time() - start
+        if not stream:
+            timing["tokens_per_sec"] = timing["output_tokens"] / duration if duration > 0 else None
+        cache_put(params, {"text": text, "duration": duration, "timing": timing})
+        if partial_path and partial_path.exists():
+            partial_path.unlink()
+        return (text, "complete", duration, timing)
+    except Exception as e:
+        return (str(e), "error", time.time() - start, {})
+
+
+def save_claude_report(problem_id: str, problem_text: str, metadata: dict, output: str, duration: float,
+                       timing: dict = None) -> Path:
+    """Write Claude's response to reports/{problem_id}_claude.json.gz. Returns the file path."""
+    claude_report = {
+        "benchmark_id": problem_id,
+        "problem_text": problem_text,
+        "metadata": metadata,
+        "generated_at": datetime.now().isoformat(),
+        "duration_seconds": duration,
+        "timing": timing or {},
+        "status": "complete",
+        "output": output
+    }
+    return write_report(problem_id, "claude", claude_report)
+
+
+# Judge input compaction. Tokens are estimated locally (no tokenizer dependency) from word
+# pieces of up to four letters, digit groups and punctuation, which errs on the high side.
+_TOKEN_RE = re.compile(r"[A-Za-z]{1,4}|\d{1,3}|[^\sA-Za-z\d]")
+_HEADING_RE = re.compile(r"^#{1,6} ", re.MULTILINE)
+
+# Section headings by how long they are kept when an output is over budget (trimmed last first)
+KEY_SECTION_WORDS = ("summary", "recommend", "concept", "solution", "insight", "contradiction",
+                     "cross-domain", "cross domain", "conclusion", "next step")
+LOW_SECTION_WORDS = ("appendix", "methodology", "metadata", "glossary", "background", "disclaimer",
+                     "acknowledg", "changelog", "usage", "debug")
+
+
+def count_tokens(text: str) -> int:
+    """Approximate Claude token count of text."""
+    return len(_TOKEN_RE.findall(text))
+
+
+def render_report(data, depth: int = 2) -> str:
+    """Render structured report data as Markdown: keys become headings (down to ####),
+    lists become bullets and anything nested deeper is written inline."""
+    if isinstance(data, dict):
+        items = [(str(k).replace('_', ' ').strip().title(), v) for k, v in data.items() if v not in (None, "", [], {})]
+        if depth > 4:
+            return "; ".join(f"{title}: {render_report(value, depth)}" for title, value in items)
+        return "\n\n".join(f"{'#' * depth} {title}\n{render_report(value, depth + 1)}" for title, value in items)
+    if isinstance(data, list):
+        items = [render_report(item, 5) for item in data if item not in (None, "", [], {})]
+        return ", ".join(items) if depth > 4 else "\n".join(f"- {item}" for item in items)
+    return str(data).strip()
+
+
+def strip_json_noise(text: str) -> str:
+    """Cheapest compaction: structured text (JSON or a printed dict) becomes Markdown sections,
+    and runs of blank lines and trailing spaces are collapsed."""
+    import ast
+
+    stripped = text.strip()
+    if stripped[:1] in ('{', '['):
+        for parse in (json.loads, ast.literal_eval):
+            try:
+                text = render_report(parse(stripped))
+                break
+            except (ValueError, SyntaxError, MemoryError, RecursionError):
+                continue
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def section_priority(section: str) -> int:
+    """0 for key sections, 1 for ordinary ones, 2 for the lowest-value ones (trimmed first)."""
+    heading = section.split("\n", 1)[0].lower() if _HEADING_RE.match(section) else ""
+    if any(word in heading for word in KEY_SECTION_WORDS):
+        return 0
+    if any(word in heading for word in LOW_SECTION_WORDS):
+        return 2
+    return 1
+
+
+def trim_section(section: str, budget: int) -> str:
+    """Cut a section to about budget tokens at paragraph, then sentence boundaries.
+
+    The heading line is always kept, followed by a marker saying how much was trimmed.
+    """
+    heading, body = "", section
+    if _HEADING_RE.match(section):
+        heading, _, body = section.partition("\n")
+    budget -= count_tokens(heading)
+    kept, used = [], 0
+    for paragraph in body.split("\n\n"):
+        cost = count_tokens(paragraph)
+        if used + cost <= budget:
+            kept.append(paragraph)
+            used += cost
+            continue
+        # Partial paragraph: whole lines (list items), then sentences of the first line that does not fit
+        lines = []
+        for line in paragraph.split("\n"):
+            cost = count_tokens(line)
+            if used + cost <= budget:
+                lines.append(line)
+                used += cost
+                continue
+            sentences = []
+            for sentence in re.split(r"(?<=[.!?])\s+", line):
+                cost = count_tokens(sentence)
+                if used + cost > budget:
+                    break
+                sentences.append(sentence)
+                used += cost
+            if sentences:
+                lines.append(" ".join(sentences))
+            break
+        if lines:
+            kept.append("\n".join(lines))
+        break
+    trimmed = count_tokens(body) - used
+    if trimmed > 0:
+        kept.append(f"[... {trimmed} tokens trimmed]")
+    return "\n".join(part for part in (heading, "\n\n".join(kept)) if part)
+
+
+def compact_output(text: str, budget: int) -> str:
+    """Fit an output into about budget tokens.
+
+    JSON noise is stripped first; if that is not enough, sections are trimmed in order
+    of value (lowest first, later sections before earlier ones) until the total fits.
+    """
+    text = strip_json_noise(text)
+    if count_tokens(text) <= budget:
+        return text
+
+    starts = [m.start() for m in _HEADING_RE.finditer(text)]
+    bounds = ([0] if not starts or starts[0] > 0 else []) + starts + [len(text)]
+    sections = [text[a:b].strip() for a, b in zip(bounds, bounds[1:])]
+    tokens = [count_tokens(section) for section in sections]
+
+    for i in sorted(range(len(sections)), key=lambda i: (-section_priority(sections[i]), -i)):
+        excess = sum(tokens) - budget
+        if excess <= 0:
+            break
+        sections[i] = trim_section(sections[i], max(tokens[i] - excess, 0))
+        tokens[i] = count_tokens(sections[i])
+    return "\n\n".join(sections)
+
+
+def fit_outputs(sparlo_out: str, claude_out: str, budget: int = JUDGE_TOKEN_BUDGET) -> tuple[str, str]:
+    """Compact both outputs into budget tokens in total: half each, with any share one
+    output does not need going to the other."""
+    sparlo_out, claude_out = strip_json_noise(sparlo_out), strip_json_noise(claude_out)
+    half = budget // 2
+    sparlo_budget = max(half, budget - count_tokens(claude_out))
+    claude_budget = max(half, budget - count_tokens(sparlo_out))
+    return (compact_output(sparlo_out, sparlo_budget), compact_output(claude_out, claude_budget))
+
+
+def evaluation_params(problem_text: str, metadata: dict, sparlo_out: str, claude_out: str) -> dict:
+    """Messages API params for judging both outputs with the submit_evaluation tool.
+
+    Tool schema and rubric come first and only the user message differs between rows.
+    Both outputs are compacted to fit JUDGE_TOKEN_BUDGET.
+    """
+    sparlo_out, claude_out = fit_outputs(sparlo_out, claude_out)
+    eval_prompt = f"""METADATA:
+- Segment: {metadata['segment']}
+- Summary: {metadata['problem_summary']}
+- Prior Art Level: {metadata['prior_art']}
+- Domain Specificity: {metadata['domain_spec']}
+- Contradiction Clarity: {metadata['contradiction']}
+- Sweetspot Prediction: {metadata['sweetspot_pred']}
+- Expected Grade: {metadata['expected_grade']}
+
+PROBLEM:
+{problem_text}
+
+OUTPUT A (SPARLO):
+{sparlo_out}
+
+OUTPUT B (CLAUDE):
+{claude_out}
+
+Evaluate both outputs against the criteria and use the submit_evaluation tool with your complete analysis."""
+
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": 8192,
+        "system": JUDGE_RUBRIC,
+        "tools": [EVALUATION_TOOL],
+        "tool_choice": {"type": "tool", "name": "submit_evaluation"},
+        "messages": [{"role": "user", "content": eval_prompt}]
+    }
+
+
+def evaluation_from_message(message) -> dict:
+    """The submit_evaluation tool input from a judge response."""
+    for block in message.content:
+        if block.type == "tool_use":
+            return block.input
+
+    raise ValueError("No evaluation tool response received")
+
+
+def usage_counts(usage, batch: bool = False) -> dict:
+    """Token counts of a Messages API response, keyed like the *_tokens columns.
+
+    batch marks usage billed at the Message Batches discount.
+    """
+    counts = {
+        "input": usage.input_tokens,
+        "output": usage.output_tokens,
+        "cache_read": usage.cache_read_input_tokens or 0,
+        "cache_write": usage.cache_creation_input_tokens or 0
+    }
+    if batch:
+        counts["batch"] = True
+    return counts
+
+
+def usage_cost(usage: dict, model: str = CLAUDE_MODEL) -> float:
+    """USD cost of usage_counts() at MODEL_PRICING, or None for an unpriced model."""
+    prices = MODEL_PRICING.get(model)
+    if prices is None:
+        return None
+    cost = sum(usage.get(kind, 0) * prices[kind] for kind in prices) / 1_000_000
+    return cost * BATCH_DISCOUNT if usage.get("batch") else cost
+
+
+def sparlo_usage(report_data) -> dict:
+    """Token counts and cost reported by Sparlo in reportData.tokenUsage, keyed like usage_counts()."""
+    tokens = report_data.get("tokenUsage") if isinstance(report_data, dict) else None
+    if not tokens:
+        return {}
+    return {
+        "input": tokens.get("inputTokens"),
+        "output": tokens.get("outputTokens"),
+        "cache_read": tokens.get("cacheReadTokens"),
+        "cache_write": tokens.get("cacheCreationTokens"),
+        "cost_usd": tokens.get("costUsd")
+    }
+
+
+def usage_columns(source: str, usage: dict) -> dict:
+    """The {source}_*_tokens and {source}_cost_usd column values for a call's usage.
+
+    Empty usage (no call was made, e.g. a response cache hit) leaves every column empty.
+    """
+    usage = usage or {}
+    columns = {f"{source}_{kind}_tokens": usage.get(kind) for kind in ("input", "output", "cache_read", "cache_write")}
+    if "cost_usd" in usage:
+        columns[f"{source}_cost_usd"] = usage["cost_usd"]
+    else:
+        columns[f"{source}_cost_usd"] = usage_cost(usage) if usage else None
+    return columns
+
+
+def evaluate_outputs(problem_text: str, metadata: dict, sparlo_out: str, claude_out: str) -> tuple[dict, dict]:
+    """Call Claude to evaluate both outputs. Returns (evaluation, usage).
+
+    usage holds the call's input, output, cache_read and cache_write token counts; it is
+    empty when the evaluation came from the response cache and no call was made.
+    """
+    params = evaluation_params(problem_text, metadata, sparlo_out, claude_out)
+
+    cached = cache_get(params)
+    if cached:
+        return (cached["evaluation"], {})
+
+    response = create_message(**params)
+    evaluation = evaluation_from_message(response)
+    cache_put(params, {"evaluation": evaluation})
+    return (evaluation, usage_counts(response.usage))
+
+
+@click.group()
+@click.option('--no-cache', is_flag=True, help='Always call the API instead of reusing cached Claude responses')
+@click.pass_context
+def cli(ctx, no_cache):
+    """Sparlo vs Claude benchmark CLI."""
+    _cache["enabled"] = not no_cache
+    _trace["run_id"] = f"{ctx.invoked_subcommand}-{datetime.now():%Y%m%d-%H%M%S}"
+    if ctx.invoked_subcommand != "status":  # status only reads results_summary; see read_summary
+        init_store()
+
+
+@cli.command()
+@click.option('--problem', required=True, help='Engineering problem text')
+@click.option('--segment', required=True, type=click.Choice(['PDC', 'RDH', 'DTS', 'IDF']))
+@click.option('--summary', required=True, help='Short problem summary')
+@click.option('--prior-art', required=True, type=click.Choice(['Low', 'Medium', 'High']))
+@click.option('--domain', required=True, type=click.Choice(['Single', 'Cross']))
+@click.option('--contradiction', required=True, type=click.Choice(['Vague', 'Clear', 'Sharp']))
+@click.option('--sweetspot', required=True, type=click.IntRange(1, 5))
+@click.option('--expected', required=True, type=click.Choice(['A', 'B', 'C', 'D', 'F']))
+@click.option('--skip-duplicates', is_flag=True, help='Do nothing if the problem (or a near-duplicate) is already stored')
+@click.option('--reuse', is_flag=True, help='Link the outputs of a stored duplicate instead of regenerating them')
+@click.option('--similarity', default=DUPLICATE_SIMILARITY, type=click.FloatRange(0, 1),
+              help='Estimated Jaccard similarity at which a problem counts as a near-duplicate')
+@click.option('--stream', is_flag=True, help='Stream the Claude response, recording time to first token')
+def generate(problem, segment, summary, prior_art, domain, contradiction, sweetspot, expected,
+             skip_duplicates, reuse, similarity, stream):
+    """Run problem through Sparlo and Claude, save outputs."""
+    import uuid
+
+    if skip_duplicates and reuse:
+        raise click.UsageError("Use either --skip-duplicates or --reuse, not both")
+    problem_id = str(uuid.uuid4())
+    click.echo(f"Starting benchmark {problem_id}...")
+    click.echo(f"Problem: {problem[:100]}...")
+
+    # Metadata for JSON files
+    metadata = {
+        "problem_id": problem_id,
+        "segment": segment,
+        "problem_summary": summary,
+        "prior_art": prior_art,
+        "domain_spec": domain,
+        "contradiction": contradiction,
+        "sweetspot_pred": sweetspot,
+        "expected_grade": expected
+    }
+
+    # Check for a stored duplicate before spending a Sparlo run
+    index = ProblemIndex.from_store(similarity) if skip_duplicates or reuse else None
+    match = duplicate_of(problem, index)
+    if match:
+        source_id, score = match
+        click.echo(f"\nProblem duplicates stored result {source_id} (similarity {score:.2f})")
+        if skip_duplicates:
+            click.echo("Skipping (--skip-duplicates).")
+            return
+        if reuse:
+            row = {**metadata, "created_at": datetime.now().isoformat(), "run_id": _trace["run_id"],
+                   "problem_text": problem}
+            if reuse_result(source_id, row, score):
+                click.echo(f"✓ Linked its outputs as {problem_id} in {DB_FILE}")
+                return
+            click.echo("  Stored result has no complete outputs to reuse, regenerating.")
+        else:
+            click.echo("  Use --skip-duplicates or --reuse to avoid regenerating it.")
+
+    # Run Sparlo (this takes ~25 minutes)
+    click.echo("\nRunning Sparlo API (this takes ~25 minutes)...")
+    sparlo_timeline, sparlo_start = [], time.time()
+    sparlo_out, sparlo_status, sparlo_time, sparlo_data = run_sparlo(problem, problem_id, sparlo_timeline)
+    click.echo(f"  Sparlo completed: {sparlo_status} in {sparlo_time:.0f}s")
+
+    # Run Claude (this takes ~30 seconds)
+    click.echo("\nRunning Claude API...")
+    claude_out, claude_status, claude_time, claude_timing = run_claude(problem, problem_id, stream)
+    click.echo(f"  Claude completed: {claude_status} in {claude_time:.0f}s")
+    if claude_timing.get("ttft_sec") is not None:
+        click.echo(f"  First token after {claude_timing['ttft_sec']:.1f}s, {claude_timing['tokens_per_sec']:.0f} tokens/s")
+
+    # Save Claude output to JSON file
+    if claude_status == "complete":
+        claude_file = save_claude_report(problem_id, problem, metadata, claude_out, claude_time, claude_timing)
+        click.echo(f"  Saved Claude output to {claude_file}")
+
+    # Write to the results store
+    row = {
+        "problem_id": problem_id,
+        "created_at": datetime.now().isoformat(),
+        "run_id": _trace["run_id"],
+        "problem_text": problem,
+        "segment": segment,
+        "problem_summary": summary,
+        "prior_art": prior_art,
+        "domain_spec": domain,
+        "contradiction": contradiction,
+        "sweetspot_pred": sweetspot,
+        "expected_grade": expected,
+        "sparlo_output": sparlo_out,
+        "claude_output": claude_out,
+        "sparlo_status": sparlo_status,
+        "claude_status": claude_status,
+        "sparlo_time_sec": sparlo_time,
+        "claude_time_sec": claude_time,
+        "sparlo_step_seconds": json.dumps(step_seconds(sparlo_timeline, sparlo_start))
+        if sparlo_status == "complete" and sparlo_timeline else None,
+        "claude_ttft_sec": claude_timing.get("ttft_sec"),
+        "claude_tokens_per_sec": claude_timing.get("tokens_per_sec"),
+        **usage_columns("sparlo", sparlo_usage(sparlo_data)),
+        **usage_columns("claude", claude_timing.get("usage")),
+        "evaluated": "false"
+    }
+
+    insert_result(row)
+
+    click.echo(f"\n✓ Saved to {DB_FILE}")
+    echo_client_stats()
+    echo_cache_stats()
+    click.echo("Run 'benchmark evaluate' to score outputs.")
+
+
+def row_metadata(row: dict) -> dict:
+    """Problem metadata fields from a results row, as passed to the judge."""
+    return {
+        'segment': row['segment'],
+        'problem_summary': row['problem_summary'],
+        'prior_art': row['prior_art'],
+        'domain_spec': row['domain_spec'],
+        'contradiction': row['contradiction'],
+        'sweetspot_pred': row['sweetspot_pred'],
+        'expected_grade': row['expected_grade']
+    }
+
+
+def evaluate_row(row: dict) -> dict:
+    """Judge one results row. Runs in a worker thread; returns (evaluation, usage).
+
+    Output bodies are loaded from their blobs here, only while the row is being judged.
+    """
+    start = time.time()
+    with span("judge", problem_id=row['problem_id']) as attrs:
+        evaluation, usage = evaluate_outputs(
+            row['problem_text'],
+            row_metadata(row),
+            load_output(row, 'sparlo'),
+            load_output(row, 'claude')
+        )
+        attrs["cached"] = not usage
+    if usage:
+        usage["seconds"] = time.time() - start
+    return (evaluation, usage)
+
+
+def apply_evaluation(row: dict, result: dict, usage: dict = None):
+    """Copy a judge result into the row's score, verdict, rationale and judge usage columns."""
+    # Update row with scores
+    sparlo = result['sparlo_scores']
+    claude = result['claude_scores']
+
+    row['sparlo_understanding'] = sparlo['understanding']
+    row['sparlo_novelty'] = sparlo['novelty']
+    row['sparlo_relevance'] = sparlo['relevance']
+    row['sparlo_credibility'] = sparlo['credibility']
+    row['sparlo_actionability'] = sparlo['actionability']
+    row['sparlo_citations'] = sparlo['citations']
+    row['sparlo_total'] = sum(sparlo.values())
+
+    row['claude_understanding'] = claude['understanding']
+    row['claude_novelty'] = claude['novelty']
+    row['claude_relevance'] = claude['relevance']
+    row['claude_credibility'] = claude['credibility']
+    row['claude_actionability'] = claude['actionability']
+    row['claude_citations'] = claude['citations']
+    row['claude_total'] = sum(claude.values())
+
+    row['winner'] = result['winner']
+    row['score_margin'] = int(row['sparlo_total']) - int(row['claude_total'])
+    row['sparlo_strengths'] = result['sparlo_strengths']
+    row['claude_strengths'] = result['claude_strengths']
+    row['key_insight'] = result['key_insight']
+    row['cross_domain_sparlo'] = result['cross_domain_sparlo']
+    row['cross_domain_claude'] = result['cross_domain_claude']
+    row['cross_domain_list_sparlo'] = ', '.join(result.get('cross_domain_list_sparlo', []))
+    row['cross_domain_list_claude'] = ', '.join(result.get('cross_domain_list_claude', []))
+    row['would_pay'] = str(result['would_pay_for_sparlo']).lower()
+    row['would_pay_rationale'] = result.get('would_pay_rationale', '')
+    row['verdict_summary'] = result.get('verdict_summary', '')
+
+    # Build full scoring rationale from per-dimension analysis
+    rationale = result.get('scoring_rationale', {})
+    full_rationale = f"""SCORING RATIONALE
+
+Understanding (Sparlo: {sparlo['understanding']}, Claude: {claude['understanding']})
+{rationale.get('understanding', 'N/A')}
+
+Novelty (Sparlo: {sparlo['novelty']}, Claude: {claude['novelty']})
+{rationale.get('novelty', 'N/A')}
+
+Relevance (Sparlo: {sparlo['relevance']}, Claude: {claude['relevance']})
+{rationale.get('relevance', 'N/A')}
+
+Credibility (Sparlo: {sparlo['credibility']}, Claude: {claude['credibility']})
+{rationale.get('credibility', 'N/A')}
+
+Actionability (Sparlo: {sparlo['actionability']}, Claude: {claude['actionability']})
+{rationale.get('actionability', 'N/A')}
+
+Citations (Sparlo: {sparlo['citations']}, Claude: {claude['citations']})
+{rationale.get('citations', 'N/A')}
+
+Cross-Domain Count
+Sparlo ({result['cross_domain_sparlo']}): {', '.join(result.get('cross_domain_list_sparlo', []))}
+Claude ({result['cross_domain_claude']}): {', '.join(result.get('cross_domain_list_claude', []))}
+
+Would Pay $50+?
+Sparlo: {'YES' if result['would_pay_for_sparlo'] else 'NO'}. {result.get('would_pay_rationale', '')}
+
+Verdict
+{result['winner'].upper()} wins by {abs(int(row['score_margin']))} points (Sparlo: {row['sparlo_total']}, Claude: {row['claude_total']}).
+{result.get('verdict_summary', '')}"""
+
+    row['scoring_rationale'] = full_rationale
+    row['notes'] = result.get('notes', row.get('notes') or '')
+    row['evaluated'] = 'true'
+
+    row.update(usage_columns("judge", usage))
+    row['judge_time_sec'] = (usage or {}).get("seconds")
+
+
+def echo_judge_usage(rows: list[dict]):
+    """Print prompt-cache token totals over the judge calls made for these rows."""
+    judged = [row for row in rows if row.get('judge_input_tokens') is not None]
+    if not judged:
+        return
+    total = {kind: sum(row[f'judge_{kind}_tokens'] for row in judged)
+             for kind in ("input", "output", "cache_read", "cache_write")}
+    click.echo(f"Judge tokens over {len(judged)} calls: {total['cache_read']} cache read, "
+               f"{total['cache_write']} cache write, {total['input']} uncached input, {total['output']} output")
+
+
+def evaluate_via_batches(rows: list[dict]) -> int:
+    """Judge rows through Message Batches, committing each evaluation as results are read.
+
+    Cached evaluations are committed without a request. Each submitted batch is recorded
+    in BATCHES_DIR; rows in a batch that was never collected (the process stopped while it
+    ran) are not submitted again, that batch is polled instead. Returns the commit count.
+    """
+    by_id = {row['problem_id']: row for row in rows}
+    records = pending_batch_records("evaluation")
+    submitted = {problem_id for record in records for problem_id in record['cache_keys']}
+    committed = 0
+    cache_keys = {}
+
+    def requests():
+        nonlocal committed
+        for row in rows:
+            if row['problem_id'] in submitted:
+                continue
+            params = evaluation_params(row['problem_text'], row_metadata(row),
+                                       load_output(row, 'sparlo'), load_output(row, 'claude'))
+            cached = cache_get(params)
+            if cached:
+                apply_evaluation(row, cached['evaluation'])
+                commit_evaluation(row)
+                committed += 1
+                continue
+            cache_keys[row['problem_id']] = cache_key(params)
+            yield (row['problem_id'], params)  # problem_ids are valid custom_ids
+
+    if records:
+        click.echo(f"Reattaching to {len(records)} submitted batch(es) covering {len(submitted)} rows")
+    for batch_id, problem_ids in submit_message_batches(requests()):
+        record = {
+            "batch_id": batch_id,
+            "kind": "evaluation",
+            "created_at": datetime.now().isoformat(),
+            "cache_keys": {problem_id: cache_keys[problem_id] for problem_id in problem_ids}
+        }
+        save_batch_record(record)
+        records.append(record)
+        click.echo(f"  Submitted batch {batch_id} with {len(problem_ids)} evaluations")
+    if committed:
+        click.echo(f"  {committed} evaluations committed from the response cache")
+
+    for record in records:
+        wait_for_message_batch(record['batch_id'], "Evaluation batch")
+        for problem_id, message, error in message_batch_results(record['batch_id']):
+            row = by_id.get(problem_id)
+            if row is None:
+                continue  # Evaluated some other way since the batch was submitted
+            try:
+                if error:
+                    raise ValueError(error)
+                evaluation = evaluation_from_message(message)
+                apply_evaluation(row, evaluation, usage_counts(message.usage, batch=True))
+            except Exception as e:
+                click.echo(f"  {problem_id[:8]}: error evaluating: {e}")
+                continue
+            cache_put(None, {"evaluation": evaluation}, key=record['cache_keys'].get(problem_id))
+            commit_evaluation(row)
+            committed += 1
+            click.echo(f"  {problem_id[:8]}: Winner: {row['winner']} (Sparlo: {row['sparlo_total']}, Claude: {row['claude_total']})")
+        record['collected_at'] = datetime.now().isoformat()
+        save_batch_record(record)
+
+    return committed
+
+
+@cli.command()
+@click.option('--workers', default=4, type=click.IntRange(1), help='Number of evaluations to run concurrently')
+@click.option('--async-batch', is_flag=True, help='Judge through the Message Batches API (slower, half the cost)')
+def evaluate(workers, async_batch):
+    """Evaluate all unevaluated rows in the results store.
+
+    Rows are judged by --workers threads sharing one rate limiter, so 429/529
+    responses pause every worker and are retried with backoff. Each finished
+    evaluation is committed to results.db immediately, so an interrupted run
+    resumes where it stopped.
+
+    With --async-batch, all rows are submitted as a Message Batch instead and
+    committed as its results are read. The batch id is kept in batches/, so an
+    interrupted run reattaches to the submitted batch rather than resubmitting.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    # Find unevaluated rows
+    to_evaluate = read_results(
+        "evaluated = 'false' AND sparlo_status = 'complete' AND claude_status = 'complete'"
+    )
+
+    if not to_evaluate:
+        click.echo("No rows to evaluate (all complete rows already evaluated)")
+        return
+
+    click.echo(f"Evaluating {len(to_evaluate)} problems...")
+
+    if async_batch:
+        try:
+            committed = evaluate_via_batches(to_evaluate)
+        except KeyboardInterrupt:
+            click.echo("\nInterrupted. Submitted batches keep running; re-run 'evaluate --async-batch' to collect them.")
+            sys.exit(130)
+        click.echo(f"\n{committed} evaluations committed to {DB_FILE}")
+    else:
+        configure_clients(workers)
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = {executor.submit(evaluate_row, row): row for row in to_evaluate}
+        committed = 0
+
+        try:
+            # Merge results back into their rows in whatever order they finish
+            for i, future in enumerate(as_completed(futures)):
+                row = futures[future]
+                click.echo(f"\n[{i+1}/{len(to_evaluate)}] {row['problem_id'][:8]}...")
+
+                try:
+                    apply_evaluation(row, *future.result())
+                except Exception as e:
+                    click.echo(f"  Error evaluating: {e}")
+                    continue
+
+                commit_evaluation(row)
+                committed += 1
+                click.echo(f"  Winner: {row['winner']} (Sparlo: {row['sparlo_total']}, Claude: {row['claude_total']})")
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            click.echo(f"\nInterrupted: {committed} evaluations committed to {DB_FILE}. Re-run evaluate to resume.")
+            sys.exit(130)
+        executor.shutdown()
+
+    # Summary
+    wins = count_winners()
+    sparlo_wins, claude_wins, ties = wins['Sparlo'], wins['Claude'], wins['Tie']
+
+    click.echo(f"\n{'='*40}")
+    click.echo(f"RESULTS: Sparlo {sparlo_wins} | Claude {claude_wins} | Ties {ties}")
+    click.echo(f"{'='*40}")
+    echo_judge_usage(to_evaluate)
+    echo_client_stats()
+    echo_cache_stats()
+
+
+@cli.command()
+def status():
+    """Show benchmark status summary.
+
+    Reads the counters kept in results_summary, so it answers in milliseconds
+    however large the store is (and suits being polled by monitoring).
+    """
+    summary = read_summary()
+    if not summary or summary['total'] == 0:
+        click.echo("No results yet. Run 'benchmark generate' first.")
+        return
+
+    total, complete, evaluated = summary['total'], summary['complete'], summary['evaluated']
+    wins = {"Sparlo": summary['sparlo_wins'], "Claude": summary['claude_wins']}
+
+    click.echo(f"Total problems: {total}")
+    click.echo(f"Complete (both APIs): {complete}")
+    click.echo(f"Evaluated: {evaluated}")
+    click.echo(f"Pending evaluation: {complete - evaluated}")
+    if evaluated > 0:
+        click.echo(f"\nResults: Sparlo {wins['Sparlo']} | Claude {wins['Claude']} | Ties {evaluated - wins['Sparlo'] - wins['Claude']}")
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0-100) of a non-empty list."""
+    ordered = sorted(values)
+    rank = min(len(ordered), max(1, math.ceil(q / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def echo_latency_table(durations: dict, indent: str = ""):
+    """Print count, p50/p95/p99, max and total seconds for each stage in durations."""
+    click.echo(f"{indent}{'stage':<18} {'n':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'total':>10}")
+    for stage, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        click.echo(f"{indent}{stage:<18} {len(values):>6} {percentile(values, 50):>9.3f} {percentile(values, 95):>9.3f} "
+                   f"{percentile(values, 99):>9.3f} {max(values):>9.3f} {sum(values):>10.1f}")
+
+
+@cli.command()
+@click.option('--trace', 'trace_path', default=str(TRACE_FILE), type=click.Path(exists=True, dir_okay=False),
+              help='Trace file to read')
+@click.option('--run', 'run_ids', multiple=True, help='Only include spans from this run id (repeatable)')
+@click.option('--last', is_flag=True, help='Only include spans from the most recent run')
+def profile(trace_path, run_ids, last):
+    """Report latency percentiles per stage and per segment from the trace file.
+
+    Stages are spans such as sparlo.create, sparlo.poll, sparlo.report,
+    claude.generate, judge, report.write, blob.write, store.insert and csv.write.
+    Judge spans answered from the response cache are left out.
+    """
+    spans = []
+    with open(trace_path, 'r') as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # Partial line from a crash mid-write
+    if last and spans:
+        run_ids = (spans[-1]['run'],)
+    if run_ids:
+        spans = [sp for sp in spans if sp.get('run') in run_ids]
+    spans = [sp for sp in spans if not sp.get('cached')]
+    if not spans:
+        click.echo("No spans to report.")
+        return
+
+    runs = list(dict.fromkeys(sp.get('run') for sp in spans))
+    click.echo(f"{len(spans)} spans from {len(runs)} run(s): {', '.join(str(r) for r in runs[-5:])}"
+               + (" ..." if len(runs) > 5 else ""))
+
+    by_stage = {}
+    for sp in spans:
+        by_stage.setdefault(sp['span'], []).append(sp['duration'])
+    errors = sum(1 for sp in spans if sp.get('error'))
+    click.echo(f"\nAll segments (seconds){f', {errors} spans with errors' if errors else ''}:")
+    echo_latency_table(by_stage, "  ")
+
+    # Spans carry problem_id; the segment comes from the results store
+    segments = {row['problem_id']: row['segment'] for row in read_results(columns=["problem_id", "segment"])}
+    by_segment = {}
+    for sp in spans:
+        segment = segments.get(sp.get('problem_id'))
+        if segment:
+            by_segment.setdefault(segment, {}).setdefault(sp['span'], []).append(sp['duration'])
+    for segment in sorted(by_segment):
+        click.echo(f"\nSegment {segment}:")
+        echo_latency_table(by_segment[segment], "  ")
+
+
+def echo_phase_table(title: str, groups: dict):
+    """Print median seconds and share of total time per Sparlo step, one column per group."""
+    import statistics
+
+    seen = {step for rows in groups.values() for row in rows for step in row['steps']}
+    steps = [step for step in SPARLO_STEPS if step in seen] + sorted(seen - set(SPARLO_STEPS))
+    names = sorted(groups)
+    click.echo(f"\n{title}:")
+    click.echo(f"  {'step':<10}" + "".join(f"{f'{name} (n={len(groups[name])})':>22}" for name in names))
+    for step in steps + ["total"]:
+        cells = []
+        for name in names:
+            rows = groups[name]
+            grand_total = sum(sum(row['steps'].values()) for row in rows)
+            if step == "total":
+                values = [sum(row['steps'].values()) for row in rows]
+            else:
+                values = [row['steps'][step] for row in rows if step in row['steps']]
+            if not values:
+                cells.append(f"{'-':>22}")
+                continue
+            share = sum(values) / grand_total * 100 if grand_total else 0
+            cells.append(f"{statistics.median(values):>13.0f}s {share:>5.1f}%")
+        click.echo(f"  {step:<10}" + "".join(cells))
+
+
+@cli.command()
+@click.option('--by', 'dimensions', multiple=True, type=click.Choice(['segment', 'prior_art', 'domain_spec']),
+              help='Breakdown to show (repeatable; default: all three)')
+def phases(dimensions):
+    """Show which Sparlo pipeline steps dominate report runtime.
+
+    Uses the per-step durations captured while polling (sparlo_step_seconds)
+    and prints each step's median seconds and share of total Sparlo time,
+    overall and by segment, prior_art and domain_spec.
+    """
+    rows = read_results("sparlo_step_seconds IS NOT NULL",
+                        columns=["segment", "prior_art", "domain_spec", "sparlo_step_seconds"])
+    if not rows:
+        click.echo("No step timelines recorded yet (captured for reports polled by generate and batch).")
+        return
+    for row in rows:
+        row['steps'] = json.loads(row['sparlo_step_seconds'])
+
+    click.echo(f"Sparlo step timelines for {len(rows)} reports (median seconds, share of total time)")
+    echo_phase_table("All reports", {"all": rows})
+    for dimension in dimensions or ('segment', 'prior_art', 'domain_spec'):
+        groups = {}
+        for row in rows:
+            groups.setdefault(row[dimension] or '-', []).append(row)
+        echo_phase_table(f"By {dimension}", groups)
+
+
+USAGE_SOURCES = ("sparlo", "claude", "judge")
+TOKEN_KINDS = ("input", "output", "cache_read", "cache_write")
+
+
+def echo_cost_table(title: str, groups: dict):
+    """Print token totals, dollar cost and output throughput per call source for each group of rows."""
+    click.echo(f"\n{title}:")
+    click.echo(f"  {'group':<26}{'source':<8}{'calls':>6}{'input':>11}{'output':>10}{'cache rd':>11}"
+               f"{'cache wr':>10}{'cost':>10}{'$/row':>8}{'out tok/s':>10}")
+    for name in sorted(groups):
+        rows = groups[name]
+        group_cost = 0.0
+        for source in USAGE_SOURCES:
+            called = [row for row in rows
+                      if row[f'{source}_input_tokens'] is not None or row[f'{source}_cost_usd'] is not None]
+            if not called:
+                continue
+            tokens = {kind: sum(row[f'{source}_{kind}_tokens'] or 0 for row in called) for kind in TOKEN_KINDS}
+            cost = sum(row[f'{source}_cost_usd'] or 0 for row in called)
+            group_cost += cost
+            # Throughput only over calls with a wall time (batched judge calls have none)
+            timed = [row for row in called if row[f'{source}_time_sec']]
+            seconds = sum(row[f'{source}_time_sec'] for row in timed)
+            rate = sum(row[f'{source}_output_tokens'] or 0 for row in timed) / seconds if seconds else None
+            click.echo(f"  {str(name)[:25]:<26}{source:<8}{len(called):>6}{tokens['input']:>11}{tokens['output']:>10}"
+                       f"{tokens['cache_read']:>11}{tokens['cache_write']:>10}{f'${cost:.2f}':>10}"
+                       f"{f'${cost / len(called):.2f}':>8}{f'{rate:.0f}' if rate else '-':>10}")
+        click.echo(f"  {str(name)[:25]:<26}{'total':<8}{len(rows):>6}{'':>53}{f'${group_cost:.2f}':>10}"
+                   f"{f'${group_cost / len(rows):.2f}':>8}")
+
+
+@cli.command()
+@click.option('--by', 'dimensions', multiple=True, type=click.Choice(['segment', 'run_id']),
+              help='Breakdown to show (repeatable; default: both)')
+def cost(dimensions):
+    """Show token usage and dollar cost of Sparlo, Claude and judge calls.
+
+    Sparlo costs are as reported by the backend; Claude and judge costs are
+    priced from MODEL_PRICING, at the Message Batches discount where batched.
+    Rows whose outputs came from the response cache or --reuse add no cost.
+    """
+    columns = ["segment", "run_id"] + [f"{source}_{suffix}" for source in USAGE_SOURCES
+                                       for suffix in [f"{kind}_tokens" for kind in TOKEN_KINDS] + ["cost_usd", "time_sec"]]
+    rows = read_results(columns=columns)
+    if not rows:
+        click.echo("No results stored yet.")
+        return
+    click.echo(f"Token usage and cost over {len(rows)} results")
+    echo_cost_table("All results", {"all": rows})
+    for dimension in dimensions or ('segment', 'run_id'):
+        groups = {}
+        for row in rows:
+            groups.setdefault(row[dimension] or '-', []).append(row)
+        echo_cost_table(f"By {dimension}", groups)
+
+
+@cli.command()
+@click.option('--csv', 'csv_path', default=str(CSV_FILE), type=click.Path(exists=True, dir_okay=False),
+              help='CSV file to import')
+def migrate(csv_path):
+    """Import rows from a results CSV (and evaluations.jsonl) into results.db."""
+    imported = migrate_csv(Path(csv_path))
+    click.echo(f"✓ Imported {imported} new rows from {csv_path} into {DB_FILE}")
+
+
+@cli.command('export-csv')
+@click.option('--output', default=str(CSV_FILE), type=click.Path(dir_okay=False), help='CSV file to write')
+@click.option('--inline-outputs/--refs-only', default=True,
+              help='Write full output bodies (default) or just their hash and path')
+def export_csv_command(output, inline_outputs):
+    """Export the results store to a CSV for spreadsheet analysis."""
+    count = export_csv(Path(output), inline_outputs)
+    click.echo(f"✓ Exported {count} rows to {output}")
+
+
+def start_sparlo_report(problem_text: str, problem_id: str = None,
+                        callback_url: str = None) -> tuple[str, str, float]:
+    """Start a Sparlo report and return (report_id, error, retry_after). Does NOT poll.
+
+    retry_after is None unless the error is worth retrying (429, 5xx or a connection
+    failure); then it holds the server's Retry-After seconds, or 0 if it gave none.
+    With callback_url, Sparlo is asked to POST {"reportId", "status"} there when the
+    report finishes.
+    """
+    import requests
+
+    if not BENCHMARK_API_KEY:
+        return ("", "BENCHMARK_API_KEY not set", None)
+
+    headers = {"x-benchmark-api-key": BENCHMARK_API_KEY}
+    body = {"designChallenge": problem_text}
+    if callback_url:
+        body["callbackUrl"] = callback_url
+
+    try:
+        with span("sparlo.create", problem_id=problem_id) as attrs:
+            resp = get_http_session().post(
+                f"{SPARLO_URL}/api/benchmark/reports",
+                json=body,
+                headers=headers,
+                timeout=60
+            )
+            attrs["http_status"] = resp.status_code
+
+        if resp.status_code != 200:
+            retry_after = None
+            if resp.status_code in SPARLO_RETRY_STATUS:
+                retry_after = float(resp.headers.get("retry-after") or 0)
+            return ("", f"HTTP {resp.status_code}: {resp.text[:100]}", retry_after)
+
+        return (resp.json()["reportId"], "", None)
+    except (requests.ConnectionError, requests.Timeout) as e:
+        return ("", str(e), 0)
+    except Exception as e:
+        return ("", str(e), None)
+
+
+def submit_backoff(failures: int, retry_after: float = 0) -> float:
+    """Seconds to hold Sparlo submissions after the given number of consecutive retryable failures."""
+    return max(retry_after, min(SPARLO_SUBMIT_BACKOFF * 2 ** (failures - 1), POLL_MAX_BACKOFF))
+
+
+def sparlo_output_text(report_data) -> str:
+    """The report text stored in the results table for a completed Sparlo reportData."""
+    if isinstance(report_data, dict):
+        return str(report_data.get("report", report_data))
+    return str(report_data)
+
+
+def poll_sparlo_report(report_id: str, problem_id: str, problem_text: str,
+                       started_at: float = None, timeline: list = None) -> tuple[str, str, dict, dict]:
+    """Poll a single Sparlo report. Returns (output, status, report_data, progress).
+
+    status is "poll_error" when the request itself failed and should be retried later.
+    progress is {"step": currentStep, "progress": phaseProgress}.
+    Each successful poll is added to timeline (see record_step), which is saved with the report.
+    """
+    headers = {"x-benchmark-api-key": BENCHMARK_API_KEY}
+    progress = {"step": None, "progress": None}
+
+    try:
+        with span("sparlo.poll", problem_id=problem_id, report_id=report_id) as attrs:
+            resp = get_http_session().get(
+                f"{SPARLO_URL}/api/benchmark/reports/{report_id}",
+                headers=headers,
+                timeout=30
+            )
+            attrs["http_status"] = resp.status_code
+            data = resp.json() if resp.status_code == 200 else {}
+            attrs["step"] = data.get("currentStep")
+
+        if resp.status_code == 404:
+            return ("", "error", {}, progress)
+        if resp.status_code != 200:
+            return ("", "poll_error", {}, progress)
+
+        status = data.get("status")
+        progress = {"step": data.get("currentStep"), "progress": data.get("phaseProgress")}
+        if timeline is not None:
+            record_step(timeline, "complete" if status == "complete" else progress["step"])
+
+        if status == "complete":
+            report_data = data.get("reportData", {})
+            output = sparlo_output_text(report_data)
+
+            # Save full JSON
+            if problem_id:
+                full_report = {
+                    "benchmark_id": problem_id,
+                    "sparlo_report_id": report_id,
+                    "problem_text": problem_text,
+                    "generated_at": datetime.now().isoformat(),
+                    "status": status,
+                    "title": data.get("title"),
+                    "report_data": report_data
+                }
+                if started_at:
+                    full_report["duration_seconds"] = time.time() - started_at
+                if timeline:
+                    full_report["step_timeline"] = timeline
+                    full_report["step_seconds"] = step_seconds(timeline, started_at)
+                write_report(problem_id, "sparlo", full_report)
+
+            return (output, "complete", report_data, progress)
+        elif status in ("error", "failed"):
+            return ("", "error", {}, progress)
+        else:
+            return ("", status, {}, progress)
+    except Exception:
+        return ("", "poll_error", {}, progress)
+
+
+def record_step(timeline: list, step: str):
+    """Add a poll observation to a report's step timeline.
+
+    Each entry is {"step", "first_seen", "last_seen"}: a new entry when the step changes,
+    otherwise last_seen moves forward. A step transition happened somewhere between the
+    previous entry's last_seen and the next entry's first_seen.
+    """
+    if not step:
+        return
+    now = round(time.time(), 3)
+    if timeline and timeline[-1]["step"] == step:
+        timeline[-1]["last_seen"] = now
+    else:
+        timeline.append({"step": step, "first_seen": now, "last_seen": now})
+
+
+def step_seconds(timeline: list, started_at: float = None) -> dict:
+    """Estimated seconds spent in each step, taking transitions at the midpoint between polls.
+
+    The first step starts at started_at when known (otherwise when it was first seen).
+    """
+    durations = {}
+    starts = [started_at or timeline[0]["first_seen"]] + [
+        (prev["last_seen"] + cur["first_seen"]) / 2 for prev, cur in zip(timeline, timeline[1:])
+    ]
+    for entry, begin, end in zip(timeline, starts, starts[1:]):
+        durations[entry["step"]] = round(durations.get(entry["step"], 0) + end - begin, 1)
+    return durations
+
+
+class PollScheduler:
+    """Decides when each pending Sparlo report should next be polled.
+
+    Each report's next poll is set from its estimated time to completion: the
+    remainder of its current step (from phaseProgress, or the median duration of
+    that step seen so far across reports) plus the typical duration of the steps
+    after it. Polls get closer together as completion nears, failed polls back off
+    exponentially, and all polls share one global requests-per-second budget.
+    """
+
+    def __init__(self, max_rps: float = POLL_MAX_RPS, fallback_interval: float = None):
+        self.max_rps = max_rps
+        self.fallback_interval = fallback_interval  # fixed interval when completions are pushed
+        self.queue = []  # heap of (next_poll_at, seq, report_id)
+        self.reports = {}  # report_id -> {step, progress, step_started, last_poll, errors}
+        self.step_durations = {}  # step -> [observed seconds]
+        self.next_slot = 0.0
+        self.seq = 0
+
+    def add(self, report_id: str, started_at: float):
+        """Start tracking a report created at started_at."""
+        self.reports[report_id] = {
+            "step": None, "progress": None, "step_started": started_at,
+            "last_poll": started_at, "changed_at": started_at, "errors": 0
+        }
+        self._schedule(report_id, started_at + (self.fallback_interval or POLL_MIN_INTERVAL))
+
+    def pending(self) -> int:
+        return len(self.reports)
+
+    def drop(self, report_id: str):
+        """Stop polling a report (its queued poll is skipped)."""
+        self.reports.pop(report_id, None)
+
+    def poll_now(self, report_id: str):
+        """Move a report's next poll forward to now (e.g. on a completion callback)."""
+        if report_id in self.reports:
+            self._schedule(report_id, time.time())
+
+    def stalled_for(self, report_id: str) -> float:
+        """Seconds since the report's step or progress last changed."""
+        return time.time() - self.reports[report_id]["changed_at"]
+
+    def next_due(self) -> float:
+        """Seconds until the next poll may be sent, without reserving it."""
+        self._prune()
+        return max(self.queue[0][0], self.next_slot, time.time()) - time.time()
+
+    def next_poll(self) -> tuple[str, float]:
+        """Reserve the next poll. Returns (report_id, seconds to wait before polling it)."""
+        self._prune()
+        now = time.time()
+        due, _, report_id = heapq.heappop(self.queue)
+        at = max(due, self.next_slot, now)
+        self.next_slot = at + 1 / self.max_rps
+        return (report_id, at - now)
+
+    def record(self, report_id: str, status: str, progress: dict):
+        """Update a report's state from a poll result and schedule its next poll."""
+        state = self.reports.get(report_id)
+        if state is None:
+            return
+        now = time.time()
+
+        if status in ("complete", "error", "timeout"):
+            del self.reports[report_id]
+            return
+
+        if status == "poll_error":
+            state["errors"] += 1
+            backoff = min(POLL_MIN_INTERVAL * 2 ** state["errors"], POLL_MAX_BACKOFF)
+            self._schedule(report_id, now + backoff)
+            return
+
+        state["errors"] = 0
+        step = progress.get("step")
+        if step != state["step"] or progress.get("progress") != state["progress"]:
+            state["changed_at"] = now
+        if step != state["step"]:
+            # The transition happened somewhere between the previous poll and this one
+            changed_at = (state["last_poll"] + now) / 2 if state["step"] else state["step_started"]
+            if state["step"]:
+                self.step_durations.setdefault(state["step"], []).append(changed_at - state["step_started"])
+            state["step"] = step
+            state["step_started"] = changed_at
+        state["progress"] = progress.get("progress")
+        state["last_poll"] = now
+
+        remaining = self._estimate_remaining(state, now)
+        if remaining > 0:
+            interval = remaining / 2
+        else:
+            # Overdue: the estimate was wrong, so widen the interval the longer it runs over
+            interval = POLL_MIN_INTERVAL - remaining / 4
+        interval = min(max(interval, POLL_MIN_INTERVAL), POLL_MAX_INTERVAL)
+        self._schedule(report_id, now + (self.fallback_interval or interval))
+
+    def _typical(self, step: str) -> float:
+        import statistics
+
+        durations = self.step_durations.get(step)
+        if not durations:
+            return SPARLO_STEP_PRIOR_SEC
+        return statistics.median(durations)
+
+    def _estimate_remaining(self, state: dict, now: float) -> float:
+        step = state["step"]
+        in_step = now - state["step_started"]
+        progress = state["progress"] or 0
+
+        if 0 < progress < 100 and in_step > 0:
+            remaining = in_step * (100 - progress) / progress
+        else:
+            remaining = self._typical(step) - in_step
+
+        if step in SPARLO_STEPS:
+            remaining += sum(self._typical(s) for s in SPARLO_STEPS[SPARLO_STEPS.index(step) + 1:])
+        return remaining
+
+    def _schedule(self, report_id: str, at: float):
+        self.seq += 1
+        self.reports[report_id]["due"] = at
+        heapq.heappush(self.queue, (at, self.seq, report_id))
+
+    def _prune(self):
+        # Drop entries of reports no longer tracked, or rescheduled since (see poll_now)
+        while self.queue and self.reports.get(self.queue[0][2], {}).get("due") != self.queue[0][0]:
+            heapq.heappop(self.queue)
+
+
+class SubmissionQueue:
+    """Admission control for starting Sparlo reports.
+
+    Jobs wait in order and are started only while fewer than max_in_flight reports
+    are running and every sliding-window limit (count, seconds) has room, so the
+    next job starts as soon as a running report finishes. A retryable submission
+    failure puts the job back at the head of the queue and holds every submission
+    back, for longer on each consecutive failure.
+    """
+
+    def __init__(self, max_in_flight: int = SPARLO_MAX_IN_FLIGHT, limits: list = (), running: int = 0):
+        self.max_in_flight = max_in_flight
+        self.limits = list(limits)  # [(count, seconds)]
+        self.waiting = deque()
+        self.in_flight = running  # reports already started by an earlier run
+        self.submitted = deque()  # times of recent submission attempts
+        self.blocked_until = 0.0
+        self.failures = 0
+
+    def add(self, job: dict):
+        self.waiting.append(job)
+
+    def pending(self) -> int:
+        return len(self.waiting)
+
+    def next_start(self) -> float:
+        """Seconds until the next job may be submitted, or None while no slot is free."""
+        if not self.waiting or self.in_flight >= self.max_in_flight:
+            return None
+        now = time.time()
+        at = max(self.blocked_until, now)
+        for count, seconds in self.limits:
+            recent = [t for t in self.submitted if t > now - seconds]
+            if len(recent) >= count:
+                at = max(at, recent[-count] + seconds)
+        return at - now
+
+    def requeue(self, job: dict):
+        """Put a job at the head of the queue (a resubmission or hedge of a running report)."""
+        self.waiting.appendleft(job)
+
+    def pop(self) -> dict:
+        """Take the next job for submission, counting it against the limits and slots."""
+        now = time.time()
+        longest = max((seconds for _, seconds in self.limits), default=0)
+        while self.submitted and self.submitted[0] <= now - longest:
+            self.submitted.popleft()
+        self.submitted.append(now)
+        self.in_flight += 1
+        return self.waiting.popleft()
+
+    def started(self):
+        self.failures = 0
+
+    def skip(self):
+        """Undo pop() for a job that no longer needs submitting."""
+        self.submitted.pop()
+        self.in_flight -= 1
+
+    def retry(self, job: dict, retry_after: float = 0) -> float:
+        """Requeue a job whose submission hit a retryable error. Returns the backoff in seconds."""
+        self.in_flight -= 1
+        self.failures += 1
+        self.waiting.appendleft(job)
+        backoff = submit_backoff(self.failures, retry_after)
+        self.blocked_until = time.time() + backoff
+        return backoff
+
+    def release(self):
+        """Free the slot of a report that finished, failed or timed out."""
+        self.in_flight -= 1
+
+
+def is_loopback(host: str) -> bool:
+    """Whether host (a name or IP address) only resolves to this machine."""
+    import ipaddress
+
+    if host.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class CallbackReceiver:
+    """Local HTTP server receiving Sparlo completion callbacks (batch --webhook).
+
+    Sparlo POSTs {"reportId": ..., "status": ...} to url when a report finishes,
+    signed with an HMAC-SHA256 of "<x-sparlo-timestamp>.<body>" under secret in
+    x-sparlo-signature. The path carries a random token, and unsigned, stale or
+    wrongly signed requests are rejected. wait() returns the report ids called
+    back so far, blocking until one arrives.
+    """
+
+    def __init__(self, bind: str = WEBHOOK_BIND, port: int = WEBHOOK_PORT, public_url: str = None,
+                 secret: str = BENCHMARK_CALLBACK_SECRET):
+        import hmac
+        import uuid
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.token = uuid.uuid4().hex
+        self.received = deque()
+        self.arrived = threading.Event()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("content-length") or 0)
+                body = self.rfile.read(length)
+                if self.path.rstrip("/") != f"/sparlo/callback/{receiver.token}":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                timestamp = self.headers.get("x-sparlo-timestamp", "")
+                expected = "sha256=" + hmac.new(secret.encode(), timestamp.encode() + b"." + body,
+                                                "sha256").hexdigest()
+                fresh = timestamp.isdigit() and abs(time.time() - int(timestamp)) <= WEBHOOK_MAX_SKEW
+                if not fresh or not hmac.compare_digest(self.headers.get("x-sparlo-signature", ""), expected):
+                    self.send_response(401)
+                    self.end_headers()
+                    return
+                try:
+                    data = json.loads(body or b"{}")
+                    report_id = data.get("reportId") or data.get("id")
+                except (ValueError, AttributeError):
+                    report_id = None
+                self.send_response(204 if report_id else 400)
+                self.end_headers()
+                if report_id:
+                    receiver.received.append(report_id)
+                    receiver.arrived.set()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((bind, port), Handler)
+        base = public_url or f"http://{bind}:{self.server.server_address[1]}"
+        self.url = f"{base.rstrip('/')}/sparlo/callback/{self.token}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def wait(self, timeout: float) -> list[str]:
+        """Report ids called back since the last call, waiting up to timeout seconds for one."""
+        if not self.received:
+            self.arrived.wait(max(timeout, 0))
+        self.arrived.clear()
+        report_ids = []
+        while self.received:
+            report_ids.append(self.received.popleft())
+        return report_ids
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# Job fields persisted in a batch manifest (outputs live in reports/ instead)
+MANIFEST_JOB_FIELDS = [
+    "problem_id", "problem", "metadata", "sparlo_report_id", "sparlo_start",
+    "sparlo_status", "sparlo_time", "sparlo_timeline", "claude_status", "claude_time", "claude_timing",
+    "claude_batch_id", "claude_batch_submitted", "sparlo_attempts", "sparlo_retries", "sparlo_hedge_id",
+    "sparlo_hedge_start", "sparlo_hedge_timeline", "saved"
+]
+
+_manifest_lock = threading.Lock()
+
+
+def new_manifest(problems_file: str) -> dict:
+    """Create an empty manifest for a new batch run under RUNS_DIR."""
+    run_id = datetime.now().strftime("batch-%Y%m%d-%H%M%S")
+    RUNS_DIR.mkdir(exist_ok=True)
+    return {
+        "run_id": run_id,
+        "problems_file": str(problems_file),
+        "created_at": datetime.now().isoformat(),
+        "path": str(RUNS_DIR / f"{run_id}.json"),
+        "jobs": []
+    }
+
+
+def save_manifest(manifest: dict):
+    """Atomically rewrite a batch manifest (temp file + rename). Safe to call from worker threads."""
+    with _manifest_lock:
+        data = dict(manifest, jobs=[
+            {k: job[k] for k in MANIFEST_JOB_FIELDS if k in job} for job in manifest['jobs']
+        ])
+        path = Path(manifest['path'])
+        tmp_path = path.with_suffix('.json.tmp')
+        with span("manifest.write", run_id=manifest['run_id']):
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, path)
+
+
+def load_manifest(path: str) -> dict:
+    """Load a batch manifest, restoring finished outputs from the saved reports."""
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    manifest['path'] = str(path)
+
+    for job in manifest['jobs']:
+        if job.get('claude_status') == 'complete':
+            claude = read_report(job['problem_id'], 'claude')
+            if claude:
+                job['claude_output'] = claude.get('output', '')
+            else:
+                del job['claude_status']  # Report went missing, so run Claude again
+
+        if job.get('sparlo_status') == 'complete':
+            sparlo = read_report(job['problem_id'], 'sparlo')
+            if sparlo:
+                job['sparlo_output'] = sparlo_output_text(sparlo.get('report_data', {}))
+                job['sparlo_usage'] = sparlo_usage(sparlo.get('report_data'))
+            else:
+                del job['sparlo_status']  # Poll again; the server still has the report
+
+    return manifest
+
+
+def finish_claude_job(job: dict, manifest: dict, output: str, status: str, duration: float, timing: dict):
+    """Record a batch job's Claude result, saving its report and the manifest right away."""
+    p = job['problem']
+    job['claude_output'] = output
+    job['claude_status'] = status
+    job['claude_time'] = duration
+    job['claude_timing'] = timing
+
+    if status == "complete":
+        save_claude_report(job['problem_id'], p['problem'], job['metadata'], output, duration, timing)
+    save_manifest(manifest)
+
+    click.echo(f"  CLAUDE {status}: {p['summary'][:40]} ({duration:.0f}s)")
+
+
+def run_claude_job(job: dict, manifest: dict, stream: bool = False) -> dict:
+    """Run Claude for a batch job and save its report as soon as it finishes. Runs in a worker thread."""
+    finish_claude_job(job, manifest, *run_claude(job['problem']['problem'], job['problem_id'], stream))
+    return job
+
+
+def run_claude_batch(jobs: list[dict], manifest: dict) -> list[dict]:
+    """Run Claude for batch jobs through Message Batches. Runs in a worker thread.
+
+    Cached responses are used directly; the rest are submitted as a Message Batch whose id
+    is kept on each job in the manifest, so a resumed run polls that batch instead of
+    submitting again. Each report is saved as its result is read.
+    """
+    by_id = {job['problem_id']: job for job in jobs}
+
+    def requests():
+        for job in jobs:
+            if job.get('claude_batch_id'):
+                continue
+            params = claude_params(job['problem']['problem'])
+            cached = cache_get(params)
+            if cached:
+                finish_claude_job(job, manifest, cached["text"], "complete", cached["duration"], cached_timing(cached))
+                continue
+            yield (job['problem_id'], params)
+
+    for batch_id, problem_ids in submit_message_batches(requests()):
+        for problem_id in problem_ids:
+            by_id[problem_id]['claude_batch_id'] = batch_id
+            by_id[problem_id]['claude_batch_submitted'] = time.time()
+        save_manifest(manifest)
+        click.echo(f"  Submitted Claude batch {batch_id} with {len(problem_ids)} requests")
+
+    batch_ids = list(dict.fromkeys(job['claude_batch_id'] for job in jobs if job.get('claude_batch_id')))
+    for batch_id in batch_ids:
+        wait_for_message_batch(batch_id, "Claude batch")
+        for problem_id, message, error in message_batch_results(batch_id):
+            job = by_id.get(problem_id)
+            if job is None or job.get('claude_status') == 'complete':
+                continue
+            duration = time.time() - job['claude_batch_submitted']
+            if error:
+                del job['claude_batch_id']  # Resubmit on resume
+                finish_claude_job(job, manifest, error, "error", duration, {})
+                continue
+            text = message.content[0].text
+            timing = {"ttft_sec": None, "tokens_per_sec": None, "output_tokens": message.usage.output_tokens,
+                      "usage": usage_counts(message.usage, batch=True), "batch_id": batch_id}
+            cache_put(claude_params(job['problem']['problem']), {"text": text, "duration": duration, "timing": timing})
+            finish_claude_job(job, manifest, text, "complete", duration, timing)
+    return jobs
+
+
+PROBLEM_FIELDS = ['problem', 'segment', 'summary', 'prior_art', 'domain', 'contradiction', 'sweetspot', 'expected']
+PROBLEM_READ_CHUNK = 64 * 1024
+
+
+class ProblemFileError(ValueError):
+    """A problems file record that cannot be parsed, with the line it starts on."""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+        self.message = message
+
+
+_WHITESPACE_RE = re.compile(r"\s*")
+
+
+def iter_json_array(f):
+    """Yield (line, value) for each element of a JSON array, decoding it a chunk at a time."""
+    decoder = json.JSONDecoder()
+    buf, pos, line, eof = "", 0, 1, False
+    want = 0  # Characters needed past pos before decoding again, once an element ran off the buffer
+    state = "open"  # open -> first -> (value -> separator)* -> done
+    while state != "done":
+        end = _WHITESPACE_RE.match(buf, pos).end()
+        line += buf.count("\n", pos, end)
+        pos = end
+        if pos == len(buf) or (not eof and len(buf) - pos < want):
+            chunk = "" if eof else f.read(PROBLEM_READ_CHUNK)
+            if chunk:
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            eof = True
+            if pos == len(buf):
+                raise ProblemFileError(line, "unexpected end of file inside the problem array")
+
+        char = buf[pos]
+        if state == "open":
+            if char != "[":
+                raise ProblemFileError(line, "expected a JSON array of problem objects or one object per line")
+            pos, state = pos + 1, "first"
+        elif state == "separator" or (state == "first" and char == "]"):
+            if char not in ",]":
+                raise ProblemFileError(line, f"expected ',' or ']' after a problem, got {char!r}")
+            pos, state = pos + 1, "value" if char == "," else "done"
+        else:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ProblemFileError(line + buf.count("\n", pos, e.pos), e.msg)
+                want = len(buf) - pos + PROBLEM_READ_CHUNK  # Element runs past the buffer
+                continue
+            if end == len(buf) and not eof:
+                want = len(buf) - pos + PROBLEM_READ_CHUNK  # A number may continue in the next chunk
+                continue
+            yield line, value
+            line += buf.count("\n", pos, end)
+            pos, state, want = end, "separator", 0
+
+
+def iter_problem_records(problems_file: str, start: int = 0, count: int = None):
+    """Yield (line, record) for the problems in a JSON array or JSONL file, without loading it whole.
+
+    The format is taken from the first character: '[' is a JSON array, read
+    element by element; anything else is one JSON object per line. Records
+    before start are passed over (JSONL lines without being parsed) and reading
+    stops once count records have been yielded. A JSONL line that is not valid
+    JSON is yielded as a ProblemFileError so the caller can skip it; a broken
+    array raises one, as nothing after it can be located.
+    """
+    with open(problems_file, 'r') as f:
+        head = f.read(PROBLEM_READ_CHUNK)
+        first = head.lstrip()[:1]
+        f.seek(0)
+        index = taken = 0
+        if first == "[":
+            records = iter_json_array(f)
+        else:
+            records = ((line, text) for line, text in enumerate(f, 1) if text.strip())
+        for line, record in records:
+            index += 1
+            if index <= start:
+                continue
+            if first != "[":
+                try:
+                    record = json.loads(record)
+                except json.JSONDecodeError as e:
+                    record = ProblemFileError(line, e.msg)
+            yield line, record
+            taken += 1
+            if count and taken >= count:
+                return
+
+
+def problem_errors(record) -> list[str]:
+    """Reasons a problems-file record cannot be queued (empty if it is valid)."""
+    if isinstance(record, ProblemFileError):
+        return [f"Invalid JSON: {record.message}"]
+    if not isinstance(record, dict):
+        return [f"Expected a problem object, got {type(record).__name__}"]
+    missing = [f for f in PROBLEM_FIELDS if f not in record]
+    if missing:
+        return [f"Missing fields: {missing}"]
+    if not isinstance(record['problem'], str) or not record['problem'].strip():
+        return ["'problem' must be non-empty text"]
+    return []
+
+
+def problem_metadata(problem_id: str, p: dict) -> dict:
+    """Report metadata for a problems-file record."""
+    return {
+        "problem_id": problem_id,
+        "segment": p['segment'],
+        "problem_summary": p['summary'],
+        "prior_art": p['prior_art'],
+        "domain_spec": p['domain'],
+        "contradiction": p['contradiction'],
+        "sweetspot_pred": p['sweetspot'],
+        "expected_grade": p['expected']
+    }
+
+
+def queue_batch_jobs(problems_file: str, start: int, count: int, manifest: dict,
+                     duplicates: str = None, similarity: float = DUPLICATE_SIMILARITY,
+                     max_in_flight: int = SPARLO_MAX_IN_FLIGHT) -> list[dict]:
+    """Read and validate problems, adding a job for each to the manifest (Phase 1).
+
+    The file (a JSON array or JSONL) is streamed: --start/--count are applied
+    while reading, each record is validated as it arrives and invalid ones are
+    skipped with their line number. Sparlo reports are not started here; Phase 3
+    submits the jobs in order as slots free up. duplicates is 'skip' or 'reuse'
+    to act on stored (or repeated) problems instead of only warning about exact
+    duplicates. With 'reuse', a problem repeating one earlier in the file is kept
+    in the manifest's repeats and linked to that job's result once it is saved.
+    """
+    import uuid
+
+    # Phase 1: Queue the problems as they are read
+    click.echo(f"\n{'='*60}")
+    click.echo(f"PHASE 1: Queueing problems from {problems_file}...")
+    click.echo(f"{'='*60}")
+
+    jobs = manifest['jobs']  # List of {problem_id, problem, metadata, sparlo_report_id (once started), ...}
+    index = ProblemIndex.from_store(similarity) if duplicates else None
+    skipped = reused = repeats = invalid = 0
+    records = iter_problem_records(problems_file, start, count)
+    try:
+        for line, p in records:
+            errors = problem_errors(p)
+            if errors:
+                click.echo(f"  SKIPPING line {line}: {'; '.join(errors)}")
+                invalid += 1
+                continue
+
+            problem_id = str(uuid.uuid4())
+            metadata = problem_metadata(problem_id, p)
+            label = f"  [line {line}] {str(p['summary'])[:40]}"
+
+            match = duplicate_of(p['problem'], index)
+            if match:
+                source_id, score = match
+                row = {**metadata, "created_at": datetime.now().isoformat(), "run_id": manifest['run_id'],
+                       "problem_text": p['problem']}
+                if not result_exists(source_id):
+                    # Repeats a problem earlier in this file; its result is not stored yet
+                    if duplicates == 'reuse':
+                        manifest.setdefault('repeats', []).append(
+                            {"source_id": source_id, "similarity": score, "row": row})
+                        click.echo(f"{label} - Will reuse: repeats problem {source_id[:8]} in this run ({score:.2f})")
+                        repeats += 1
+                    else:
+                        click.echo(f"{label} - Skipped: repeats problem {source_id[:8]} in this run")
+                        skipped += 1
+                    continue
+                if duplicates == 'skip':
+                    click.echo(f"{label} - Skipped: duplicates {source_id[:8]} ({score:.2f})")
+                    skipped += 1
+                    continue
+                if duplicates == 'reuse':
+                    if reuse_result(source_id, row, score):
+                        click.echo(f"{label} - Reused: outputs of {source_id[:8]} ({score:.2f})")
+                        reused += 1
+                        continue
+                click.echo(f"{label} - Note: duplicates stored result {source_id[:8]} ({score:.2f})")
+
+            if index is not None:
+                index.add_text(problem_id, p['problem'])
+
+            click.echo(f"{label} - Queued")
+            jobs.append({
+                "problem_id": problem_id,
+                "problem": p,
+                "metadata": metadata
+            })
+    except ProblemFileError as e:
+        click.echo(f"ERROR: {problems_file}: {e}")
+        jobs.clear()
+        return []
+    finally:
+        records.close()
+
+    if invalid:
+        click.echo(f"  Invalid records: {invalid} skipped")
+    if skipped or reused or repeats:
+        click.echo(f"  Duplicates: {skipped} skipped, {reused} reused"
+                   + (f", {repeats} to reuse once this run saves the problem they repeat" if repeats else ""))
+
+    if not jobs:
+        click.echo("No problems queued.")
+        return []
+
+    waves = -(-len(jobs) // max_in_flight)
+    click.echo(f"\nQueued {len(jobs)} problems (parallel mode)")
+    click.echo(f"Estimated time: ~{waves * 25 + 5} minutes ({max_in_flight} Sparlo reports at a time)")
+
+    save_manifest(manifest)
+
+    click.echo(f"  Manifest: {manifest['path']} (resume with 'batch --resume {manifest['path']}')")
+    return jobs
+
+
+def save_repeats(manifest: dict) -> int:
+    """Store the manifest's in-file repeats as rows reusing their first occurrence's outputs.
+
+    Runs after Phase 4 has saved the jobs they repeat. A repeat whose source did
+    not complete is reported rather than stored. Returns the number of rows stored.
+    """
+    stored = 0
+    for repeat in manifest.get('repeats', []):
+        if repeat.get('saved'):
+            continue
+        row = dict(repeat['row'])
+        if result_exists(row['problem_id']) or reuse_result(repeat['source_id'], row, repeat['similarity']):
+            stored += 1
+        else:
+            click.echo(f"  NOT REUSED: {str(row['problem_summary'])[:40]} - "
+                       f"repeated problem {repeat['source_id'][:8]} did not complete")
+        repeat['saved'] = True
+    if manifest.get('repeats'):
+        save_manifest(manifest)
+    return stored
+
+
+def hedge_threshold(durations: list[float]) -> float:
+    """Seconds after which a running report is hedged: the HEDGE_PERCENTILE of observed
+    report durations, or None until HEDGE_MIN_SAMPLES have been seen."""
+    if len(durations) < HEDGE_MIN_SAMPLES:
+        return None
+    return percentile(durations, HEDGE_PERCENTILE)
+
+
+def promote_hedge(job: dict):
+    """Make a job's hedge report its primary one."""
+    job['sparlo_report_id'] = job.pop('sparlo_hedge_id')
+    job['sparlo_start'] = job.pop('sparlo_hedge_start')
+    job['sparlo_timeline'] = job.pop('sparlo_hedge_timeline', [])
+
+
+def clear_hedge(job: dict):
+    """Forget a job's hedge report, if it has one."""
+    for key in ('sparlo_hedge_id', 'sparlo_hedge_start', 'sparlo_hedge_timeline'):
+        job.pop(key, None)
+
+
+def run_sparlo_jobs(jobs: list[dict], manifest: dict, max_in_flight: int, submit_limits: list, poll_rps: float,
+                    deadline: float = SPARLO_DEADLINE_SEC, stall: float = SPARLO_STALL_SEC, retries: int = 1,
+                    hedge: bool = False, receiver: CallbackReceiver = None):
+    """Start queued Sparlo reports as slots free up and poll the running ones until each job finishes (Phase 3).
+
+    Every report attempt gets its own deadline. An attempt that errors, makes no
+    progress for stall seconds or passes its deadline is resubmitted while the
+    job has retries left, and otherwise ends the job as error or timeout. With
+    hedge, a report still running past the observed p95 duration gets a duplicate
+    report; whichever finishes first is kept and the other is no longer polled.
+    With a receiver, reports are started with its callback URL and polled right
+    away when their callback arrives. Polling keeps the normal adaptive cadence
+    until the first callback shows the backend delivers them, and only then
+    slows to every WEBHOOK_FALLBACK_INTERVAL.
+    """
+    by_report = {}
+    queued = []
+    scheduler = PollScheduler(max_rps=poll_rps)
+    for job in jobs:
+        if job.get('sparlo_status') in ('complete', 'error'):
+            continue
+        if not job.get('sparlo_report_id'):
+            queued.append(job)
+            continue
+        # Started by an earlier run (including ones that timed out there): poll it again
+        for report_id, started_at in ((job['sparlo_report_id'], job['sparlo_start']),
+                                      (job.get('sparlo_hedge_id'), job.get('sparlo_hedge_start'))):
+            if report_id:
+                by_report[report_id] = job
+                scheduler.add(report_id, started_at)
+    queue = SubmissionQueue(max_in_flight, submit_limits, running=len(by_report))
+    for job in queued:
+        queue.add(job)
+
+    durations = [row['sparlo_time_sec'] for row in read_results(
+        "sparlo_status = 'complete' AND sparlo_time_sec > 0", columns=["sparlo_time_sec"])] if hedge else []
+    poll_start = time.time()
+
+    while queue.pending() or scheduler.pending():
+        submit_in = queue.next_start()
+        poll_in = scheduler.next_due() if scheduler.pending() else None
+        if receiver is not None:
+            # Sleep until the next submission or fallback poll, waking early on a callback
+            waits = [d for d in (submit_in, poll_in) if d is not None]
+            for report_id in receiver.wait(min(waits) if waits else 0):
+                scheduler.fallback_interval = WEBHOOK_FALLBACK_INTERVAL  # Callbacks work, so poll rarely
+                scheduler.poll_now(report_id)
+            submit_in = queue.next_start()
+            poll_in = scheduler.next_due() if scheduler.pending() else None
+        if submit_in is not None and (poll_in is None or submit_in <= poll_in):
+            time.sleep(submit_in)
+            job = queue.pop()
+            p = job['problem']
+            if job.get('sparlo_status') in ('complete', 'error', 'timeout'):
+                queue.skip()  # A queued hedge whose report finished first
+                continue
+            hedging = bool(job.get('sparlo_report_id'))
+            report_id, error, retry_after = start_sparlo_report(p['problem'], job['problem_id'],
+                                                                receiver.url if receiver else None)
+            if error and retry_after is not None and job.get('submit_failures', 0) < SPARLO_SUBMIT_RETRIES:
+                job['submit_failures'] = job.get('submit_failures', 0) + 1
+                backoff = queue.retry(job, retry_after)
+                click.echo(f"  BUSY: {p['summary'][:40]} - {error[:40]}, holding submissions for {backoff:.0f}s")
+                continue
+            job['hedge_queued'] = False
+            if error:
+                queue.release()
+                click.echo(f"  ERROR: {p['summary'][:40]} - {error}")
+                if not hedging:
+                    job['sparlo_output'] = ""
+                    job['sparlo_status'] = "error"
+                    job['sparlo_time'] = 0
+                save_manifest(manifest)
+                continue
+            queue.started()
+            job['sparlo_attempts'] = job.get('sparlo_attempts', 0) + 1
+            by_report[report_id] = job
+            if hedging:
+                job['sparlo_hedge_id'] = report_id
+                job['sparlo_hedge_start'] = time.time()
+                job['sparlo_hedge_timeline'] = []
+                scheduler.add(report_id, job['sparlo_hedge_start'])
+                click.echo(f"  HEDGED: {p['summary'][:40]} - {report_id[:8]}... "
+                           f"({queue.in_flight} in flight, {queue.pending()} queued)")
+            else:
+                job['sparlo_report_id'] = report_id
+                job['sparlo_start'] = time.time()
+                job['sparlo_timeline'] = []
+                scheduler.add(report_id, job['sparlo_start'])
+                click.echo(f"  STARTED: {p['summary'][:40]} - {report_id[:8]}... "
+                           f"({queue.in_flight} in flight, {queue.pending()} queued)")
+            save_manifest(manifest)
+            continue
+        if poll_in is None:
+            break  # Nothing running and nothing startable
+
+        report_id, delay = scheduler.next_poll()
+        job = by_report[report_id]
+        p = job['problem']
+        is_hedge = report_id == job.get('sparlo_hedge_id')
+        prefix = 'sparlo_hedge' if is_hedge else 'sparlo'
+        started_at = job[f'{prefix}_start']
+
+        if time.time() + delay >= max(started_at, poll_start) + deadline:
+            status, progress = "timeout", {}
+        else:
+            time.sleep(delay)
+            output, status, report_data, progress = poll_sparlo_report(
+                report_id,
+                job['problem_id'],
+                p['problem'],
+                started_at,
+                job.setdefault(f'{prefix}_timeline', [])
+            )
+            if status == "processing" and scheduler.stalled_for(report_id) >= stall:
+                status = "stalled"
+        scheduler.record(report_id, status, progress)
+        elapsed = time.time() - started_at
+
+        if status == "complete":
+            other = job.get('sparlo_report_id') if is_hedge else job.get('sparlo_hedge_id')
+            if is_hedge:
+                promote_hedge(job)
+                click.echo(f"  COMPLETE: {p['summary'][:40]} ({elapsed:.0f}s, hedge finished first)")
+            else:
+                clear_hedge(job)
+                click.echo(f"  COMPLETE: {p['summary'][:40]} ({elapsed:.0f}s)")
+            if other:
+                # The slower copy is no longer polled (Sparlo has no cancel endpoint)
+                scheduler.drop(other)
+                queue.release()
+            job['sparlo_output'] = output
+            job['sparlo_usage'] = sparlo_usage(report_data)
+            job['sparlo_status'] = "complete"
+            job['sparlo_time'] = elapsed
+            durations.append(elapsed)
+        elif status in ("error", "stalled", "timeout"):
+            scheduler.drop(report_id)
+            retried = job.get('sparlo_retries', 0)
+            if is_hedge:
+                clear_hedge(job)
+                click.echo(f"  HEDGE {status.upper()}: {p['summary'][:40]} ({elapsed:.0f}s), keeping the first report")
+            elif job.get('sparlo_hedge_id'):
+                promote_hedge(job)
+                click.echo(f"  {status.upper()}: {p['summary'][:40]} ({elapsed:.0f}s), continuing with its hedge")
+            elif retried < retries:
+                job['sparlo_retries'] = retried + 1
+                job['sparlo_report_id'] = None
+                if not job.get('hedge_queued'):
+                    queue.requeue(job)
+                job['hedge_queued'] = False
+                click.echo(f"  {status.upper()}: {p['summary'][:40]} ({elapsed:.0f}s), resubmitting "
+                           f"(retry {retried + 1}/{retries})")
+            else:
+                # A timed out report is polled again by a later --resume
+                job['sparlo_output'] = ""
+                job['sparlo_status'] = "error" if status == "error" else "timeout"
+                job['sparlo_time'] = elapsed
+                click.echo(f"  {status.upper()}: {p['summary'][:40]} ({elapsed:.0f}s)")
+        elif status == "poll_error":
+            click.echo(f"  POLL FAILED: {p['summary'][:40]} - backing off")
+        else:
+            click.echo(f"  PENDING: {p['summary'][:40]} - {progress['step']} ({progress['progress']}%) ({elapsed:.0f}s)")
+            threshold = hedge_threshold(durations) if hedge else None
+            if (threshold and not is_hedge and elapsed > threshold
+                    and not job.get('sparlo_hedge_id') and not job.get('hedge_queued')):
+                job['hedge_queued'] = True
+                queue.requeue(job)
+                click.echo(f"  HEDGING: {p['summary'][:40]} - running past p{HEDGE_PERCENTILE} ({threshold:.0f}s)")
+
+        if status in ("complete", "error", "stalled", "timeout"):
+            queue.release()
+            record_span("sparlo.report", started_at, elapsed, problem_id=job['problem_id'], status=status,
+                        hedge=is_hedge)
+            save_manifest(manifest)
+            if scheduler.pending() or queue.pending():
+                click.echo(f"  ... {scheduler.pending()} reports still processing, {queue.pending()} queued ...")
+    save_manifest(manifest)
+
+
+def parse_submit_limits(ctx, param, values) -> list[tuple[int, float]]:
+    """Parse COUNT/SECONDS sliding-window limits given to --submit-limit."""
+    limits = []
+    for value in values:
+        try:
+            count, seconds = value.split('/')
+            limits.append((int(count), float(seconds)))
+        except ValueError:
+            raise click.BadParameter(f"expected COUNT/SECONDS, got {value!r}")
+        if limits[-1][0] < 1 or limits[-1][1] <= 0:
+            raise click.BadParameter(f"COUNT and SECONDS must be positive, got {value!r}")
+    return limits
+
+
+@cli.command()
+@click.argument('problems_file', required=False, type=click.Path(exists=True))
+@click.option('--resume', type=click.Path(exists=True), help='Resume an interrupted run from its manifest in runs/')
+@click.option('--start', default=0, help='Start from problem index (0-based)')
+@click.option('--count', default=None, type=int, help='Number of problems to run (default: all)')
+@click.option('--max-concurrency', default=8, type=click.IntRange(1), help='Max concurrent Claude requests')
+@click.option('--poll-rps', default=POLL_MAX_RPS, type=click.FloatRange(0, min_open=True),
+              help='Max Sparlo status requests per second across all reports')
+@click.option('--skip-duplicates', is_flag=True, help='Skip problems (or near-duplicates) that are already stored')
+@click.option('--reuse', is_flag=True, help='Link the outputs of stored duplicates instead of regenerating them')
+@click.option('--similarity', default=DUPLICATE_SIMILARITY, type=click.FloatRange(0, 1),
+              help='Estimated Jaccard similarity at which a problem counts as a near-duplicate')
+@click.option('--stream', is_flag=True, help='Stream Claude responses, recording time to first token')
+@click.option('--claude-via-batches', is_flag=True,
+              help='Submit the Claude requests as one Message Batch (half the cost, off the per-minute limits)')
+@click.option('--max-in-flight', default=SPARLO_MAX_IN_FLIGHT, type=click.IntRange(1),
+              help='Max Sparlo reports running at once; the rest wait in a queue')
+@click.option('--submit-limit', 'submit_limits', multiple=True, callback=parse_submit_limits, metavar='COUNT/SECONDS',
+              help='Start at most COUNT Sparlo reports in any SECONDS window (repeatable, e.g. 10/60)')
+@click.option('--deadline', default=SPARLO_DEADLINE_SEC / 60, type=click.FloatRange(0, min_open=True),
+              help='Minutes each Sparlo report attempt may run')
+@click.option('--stall-minutes', default=SPARLO_STALL_SEC / 60, type=click.FloatRange(0, min_open=True),
+              help='Resubmit a Sparlo report whose step and progress have not changed for this long')
+@click.option('--retries', default=1, type=click.IntRange(0),
+              help='Resubmissions allowed per problem after an error, stall or deadline')
+@click.option('--hedge', is_flag=True,
+              help=f'Start a duplicate Sparlo report for any still running past the observed p{HEDGE_PERCENTILE}')
+@click.option('--webhook', is_flag=True,
+              help='Receive Sparlo completion callbacks on a local server, polling only as a slow fallback')
+@click.option('--webhook-port', default=WEBHOOK_PORT, type=click.IntRange(0, 65535),
+              help='Port for the --webhook receiver (0 picks a free one)')
+@click.option('--callback-url', default=WEBHOOK_PUBLIC_URL,
+              help='Public base URL that reaches the --webhook receiver (default: its local address)')
+def batch(problems_file, resume, start, count, max_concurrency, poll_rps, skip_duplicates, reuse, similarity, stream,
+          claude_via_batches, max_in_flight, submit_limits, deadline, stall_minutes, retries, hedge, webhook,
+          webhook_port, callback_url):
+    """Run multiple problems from a JSON or JSONL file (parallel execution).
+
+    PROBLEMS_FILE should be a JSON file with an array of problem objects, or a
+    JSONL file with one problem object per line:
+
+    \b
+    [
+      {
+        "problem": "Engineering problem description...",
+        "segment": "PDC",
+        "summary": "Short summary",
+        "prior_art": "Medium",
+        "domain": "Cross",
+        "contradiction": "Sharp",
+        "sweetspot": 5,
+        "expected": "A"
+      },
+      ...
+    ]
+
+    The file is read a record at a time: --start/--count are applied while
+    reading, and invalid records are skipped with their line number.
+
+    Runs Sparlo and Claude requests in parallel instead of ~25 min per problem
+    sequentially. Claude requests run in a background thread pool
+    (--max-concurrency). Sparlo reports are admitted from a queue: at most
+    --max-in-flight run at once (and --submit-limit caps how fast they start),
+    the next one starting as soon as a running report finishes. Submissions
+    rejected with 429/5xx back off and retry instead of failing the problem.
+
+    Each report attempt has its own --deadline; an attempt that errors, stalls
+    or runs out of time is resubmitted up to --retries times. With --hedge, a
+    report running past the p95 of observed durations gets a duplicate and the
+    first of the two to finish is kept.
+
+    With --webhook, reports are started with a callback URL served by a local
+    receiver and fetched as soon as Sparlo calls it; polling drops to a slow
+    fallback. Use --callback-url when Sparlo reaches the receiver through a
+    tunnel or proxy.
+
+    Progress is recorded in a manifest under runs/. If the process dies, run
+    'batch --resume runs/<run_id>.json' to reattach to the in-flight Sparlo
+    reports, skip finished Claude calls and go straight back to polling.
+
+    With --claude-via-batches, the Claude requests go out as a Message Batch
+    instead; its id is kept in the manifest so --resume collects that batch.
+
+    Problems already in the results store (or near-duplicates of them) can be
+    left out with --skip-duplicates, or linked to the stored outputs with --reuse.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait
+
+    if webhook and not BENCHMARK_CALLBACK_SECRET:
+        raise click.UsageError("--webhook needs BENCHMARK_CALLBACK_SECRET, the secret Sparlo signs callbacks with")
+    if webhook and not callback_url and is_loopback(WEBHOOK_BIND):
+        from urllib.parse import urlsplit
+
+        if not is_loopback(urlsplit(SPARLO_URL).hostname or ""):
+            # Sparlo only calls back to public addresses
+            raise click.UsageError(f"The --webhook receiver on {WEBHOOK_BIND} is only reachable from this machine; "
+                                   "pass --callback-url (or WEBHOOK_PUBLIC_URL) with a public URL that reaches it")
+
+    batch_start = time.time()
+    configure_clients(max_concurrency)
+
+    if resume:
+        manifest = load_manifest(resume)
+        jobs = [job for job in manifest['jobs'] if not job.get('saved')]
+        claude_done = sum(1 for job in jobs if job.get('claude_status') == 'complete')
+        sparlo_done = sum(1 for job in jobs if job.get('sparlo_status') in ('complete', 'error'))
+        click.echo(f"Resuming {manifest['run_id']}: {len(jobs)} unsaved jobs "
+                   f"({claude_done} Claude complete, {sparlo_done} Sparlo finished)")
+        if not jobs:
+            click.echo("All jobs in this manifest are already saved.")
+            save_repeats(manifest)
+            return
+    elif not problems_file:
+        raise click.UsageError("Provide PROBLEMS_FILE or --resume <manifest>")
+    else:
+        if skip_duplicates and reuse:
+            raise click.UsageError("Use either --skip-duplicates or --reuse, not both")
+        manifest = new_manifest(problems_file)
+        duplicates = 'skip' if skip_duplicates else 'reuse' if reuse else None
+        jobs = queue_batch_jobs(problems_file, start, count, manifest, duplicates, similarity, max_in_flight)
+        if not jobs:
+            return
+
+    # Phase 2: Run Claude requests concurrently, overlapping with Sparlo polling
+    claude_jobs = [job for job in jobs if job.get('claude_status') != 'complete']
+    click.echo(f"\n{'='*60}")
+    if claude_via_batches:
+        click.echo(f"PHASE 2: Running {len(claude_jobs)} Claude requests as a Message Batch in background...")
+    else:
+        click.echo(f"PHASE 2: Running {len(claude_jobs)} Claude requests in background (max {max_concurrency} concurrent)...")
+    click.echo(f"{'='*60}")
+
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    if claude_via_batches:
+        claude_futures = [executor.submit(run_claude_batch, claude_jobs, manifest)] if claude_jobs else []
+    else:
+        claude_futures = [executor.submit(run_claude_job, job, manifest, stream) for job in claude_jobs]
+
+    # Phase 3: Start queued Sparlo reports as slots free up, polling the running ones
+    click.echo(f"\n{'='*60}")
+    click.echo(f"PHASE 3: Running Sparlo reports (max {max_in_flight} in flight)...")
+    click.echo(f"{'='*60}")
+
+    receiver = CallbackReceiver(WEBHOOK_BIND, webhook_port, callback_url) if webhook else None
+    if receiver:
+        click.echo(f"  Receiving completion callbacks at {receiver.url}")
+    try:
+        run_sparlo_jobs(jobs, manifest, max_in_flight, submit_limits, poll_rps,
+                        deadline * 60, stall_minutes * 60, retries, hedge, receiver)
+    finally:
+        if receiver:
+            receiver.close()
+
+    # Wait for any Claude requests still running
+    if not all(f.done() for f in claude_futures):
+        click.echo("  Waiting for remaining Claude requests...")
+    wait(claude_futures)
+    executor.shutdown()
+    for future in claude_futures:
+        if future.exception():
+            click.echo(f"  ERROR: Claude requests failed: {future.exception()}")
+
+    # Phase 4: Write all results to the store
+    click.echo(f"\n{'='*60}")
+    click.echo("PHASE 4: Saving results...")
+    click.echo(f"{'='*60}")
+
+    for job in jobs:
+        if result_exists(job['problem_id']):
+            job['saved'] = True  # Written before an interruption
+            continue
+        p = job['problem']
+        row = {
+            "problem_id": job['problem_id'],
+            "created_at": datetime.now().isoformat(),
+            "run_id": manifest['run_id'],
+            "problem_text": p['problem'],
+            "segment": p['segment'],
+            "problem_summary": p['summary'],
+            "prior_art": p['prior_art'],
+            "domain_spec": p['domain'],
+            "contradiction": p['contradiction'],
+            "sweetspot_pred": p['sweetspot'],
+            "expected_grade": p['expected'],
+            "sparlo_output": job.get('sparlo_output', ''),
+            "claude_output": job.get('claude_output', ''),
+            "sparlo_status": job.get('sparlo_status', 'error'),
+            "claude_status": job.get('claude_status', 'error'),
+            "sparlo_time_sec": job.get('sparlo_time', 0),
+            "claude_time_sec": job.get('claude_time', 0),
+            "sparlo_step_seconds": json.dumps(step_seconds(job['sparlo_timeline'], job['sparlo_start']))
+            if job.get('sparlo_status') == 'complete' and job.get('sparlo_timeline') else None,
+            "sparlo_attempts": job.get('sparlo_attempts'),
+            "claude_ttft_sec": job.get('claude_timing', {}).get('ttft_sec'),
+            "claude_tokens_per_sec": job.get('claude_timing', {}).get('tokens_per_sec'),
+            **usage_columns("sparlo", job.get('sparlo_usage')),
+            **usage_columns("claude", job.get('claude_timing', {}).get('usage')),
+            "evaluated": "false"
+        }
+
+        insert_result(row)
+        job['saved'] = True
+
+    save_manifest(manifest)
+    repeated = save_repeats(manifest)
+    if repeated:
+        click.echo(f"  Reused: {repeated} repeated problems linked to this run's results")
+
+    # Summary
+    complete = sum(1 for j in jobs if j.get('sparlo_status') == 'complete')
+    click.echo(f"\n{'='*60}")
+    click.echo(f"BATCH COMPLETE: {complete}/{len(jobs)} problems succeeded")
+    click.echo(f"Total time: {(time.time() - batch_start):.0f}s")
+    echo_client_stats()
+    echo_cache_stats()
+    click.echo(f"Run 'python benchmark.py evaluate' to score all outputs")
+    click.echo(f"{'='*60}")
+
+
+@cli.command()
+@click.option('--reports-dir', default=REPORTS_DIR, help='Directory containing report files')
+def import_reports(reports_dir):
+    """Import saved report pairs (Sparlo + Claude) from the reports directory into the results store.
+
+    This is useful when the batch command was interrupted before saving results.
+    Only imports pairs where both Sparlo and Claude reports exist.
+    """
+    import os
+
+    # Find all pairs (compressed .json.gz or legacy .json)
+    files = [f.removesuffix('.gz') for f in os.listdir(reports_dir)]
+    sparlo_ids = {f.replace('_sparlo.json', '') for f in files if f.endswith('_sparlo.json')}
+    claude_ids = {f.replace('_claude.json', '') for f in files if f.endswith('_claude.json')}
+    pairs = sparlo_ids & claude_ids
+
+    click.echo(f"Found {len(pairs)} complete report pairs")
+    if not pairs:
+        return
+
+    imported = 0
+    skipped = 0
+
+    for problem_id in pairs:
+        # Check if already stored (indexed lookup, before loading the reports)
+        if result_exists(problem_id):
+            click.echo(f"  SKIP: {problem_id[:8]}... (already in results)")
+            skipped += 1
+            continue
+
+        # Load reports
+        sparlo = read_report(problem_id, 'sparlo', reports_dir)
+        claude = read_report(problem_id, 'claude', reports_dir)
+
+        # Extract data
+        metadata = claude.get('metadata', {})
+        problem_text = sparlo.get('problem_text', claude.get('problem_text', ''))
+
+        # Get Sparlo output (extract research content from report_data)
+        sparlo_output = ""
+        report_data = sparlo.get('report_data')
+        if report_data:
+            if isinstance(report_data, str):
+                sparlo_output = report_data
+            elif isinstance(report_data, dict):
+                # Extract the main research content sections
+                sections = []
+                for key in ['executive_summary', 'problem_analysis', 'solution_approaches',
+                           'research_synthesis', 'recommendations', 'conclusion']:
+                    if key in report_data:
+                        sections.append(f"## {key.replace('_', ' ').title()}\n{report_data[key]}")
+                sparlo_output = "\n\n".join(sections) if sections else render_report(report_data)
+
+        claude_output = claude.get('output', '')
+
+        row = {
+            "problem_id": problem_id,
+            "created_at": sparlo.get('generated_at', datetime.now().isoformat()),
+            "run_id": _trace["run_id"],
+            "problem_text": problem_text,
+            "segment": metadata.get('segment', 'Unknown'),
+            "problem_summary": metadata.get('problem_summary', problem_text[:50]),
+            "prior_art": metadata.get('prior_art', 'Unknown'),
+            "domain_spec": metadata.get('domain_spec', 'Unknown'),
+            "contradiction": metadata.get('contradiction', 'Unknown'),
+            "sweetspot_pred": metadata.get('sweetspot_pred', 0),
+            "expected_grade": metadata.get('expected_grade', 'Unknown'),
+            "sparlo_output": sparlo_output,
+            "claude_output": claude_output,
+            "sparlo_status": sparlo.get('status', 'complete'),
+            "claude_status": claude.get('status', 'complete'),
+            "sparlo_time_sec": sparlo.get('duration_seconds', 0),  # Saved with reports polled since tracing
+            "sparlo_step_seconds": json.dumps(sparlo['step_seconds']) if sparlo.get('step_seconds') else None,
+            "claude_time_sec": claude.get('duration_seconds', 0),
+            "claude_ttft_sec": claude.get('timing', {}).get('ttft_sec'),
+            "claude_tokens_per_sec": claude.get('timing', {}).get('tokens_per_sec'),
+            **usage_columns("sparlo", sparlo_usage(report_data)),
+            **usage_columns("claude", claude.get('timing', {}).get('usage')),
+            "evaluated": "false"
+        }
+
+        insert_result(row)
+
+        click.echo(f"  IMPORTED: {problem_id[:8]}... - {row['problem_summary'][:40]}")
+        imported += 1
+
+    click.echo(f"\nImported: {imported}, Skipped: {skipped}")
+    click.echo(f"Run 'python benchmark.py evaluate' to score all outputs")
+
+
+# Shared work queue: 'enqueue' adds work items to results.db, and any number of 'worker'
+# processes claim them under leases that are renewed while the work runs
+
+
+class LeaseLost(Exception):
+    """A work item's lease was released or taken over by another worker after it expired."""
+
+
+def enqueue_work_items(kind: str, items) -> int:
+    """Add (problem_id, run_id, payload) items to the work queue in one transaction. Returns how many were new.
+
+    items may be a generator; it is consumed while the transaction is open, so an
+    exception from it rolls back everything queued by this call.
+    """
+    conn = get_store()
+    now = datetime.now().isoformat()
+    added = 0
+
+    def insert(chunk):
+        return conn.executemany(
+            "INSERT OR IGNORE INTO work_items (kind, problem_id, run_id, payload, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)", [(kind, *item, now, now) for item in chunk]
+        ).rowcount
+
+    with _store_lock, conn:
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) == 1000:
+                added += insert(chunk)
+                chunk = []
+        added += insert(chunk) if chunk else 0
+    return added
+
+
+def claim_work_item(worker_id: str, kinds: tuple, lease_sec: float) -> dict:
+    """Lease the oldest queued (or expired) item of the given kinds to worker_id, or return None.
+
+    Items whose lease has expired WORK_MAX_ATTEMPTS times are marked failed instead.
+    """
+    conn = get_store()
+    now = time.time()
+    stamp = datetime.now().isoformat()
+    kind_list = ", ".join("?" * len(kinds))
+    with _store_lock, conn:
+        conn.execute(
+            "UPDATE work_items SET status = 'failed', error = COALESCE(error, 'lease expired'), updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (stamp, now, WORK_MAX_ATTEMPTS)
+        )
+        row = conn.execute(f"""
+            UPDATE work_items
+            SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ?
+            WHERE id = (
+                SELECT id FROM work_items
+                WHERE kind IN ({kind_list}) AND (status = 'queued' OR (status = 'leased' AND lease_expires < ?))
+                ORDER BY id LIMIT 1
+            )
+            RETURNING *
+        """, (worker_id, now + lease_sec, stamp, *kinds, now)).fetchone()
+    return dict(row) if row else None
+
+
+def finish_work_item(item: dict, worker_id: str, status: str, error: str = None) -> bool:
+    """Set a leased item's final (or requeued) status. Returns False if the lease was lost meanwhile."""
+    conn = get_store()
+    with _store_lock, conn:
+        cur = conn.execute(
+            "UPDATE work_items SET status = ?, error = ?, lease_expires = NULL, updated_at = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (status, error, datetime.now().isoformat(), item['id'], worker_id)
+        )
+    return cur.rowcount == 1
+
+
+def release_work_items(worker_id: str) -> int:
+    """Return a stopping worker's leased items to the queue, keeping their state and not counting the attempt."""
+    conn = get_store()
+    with _store_lock, conn:
+        return conn.execute(
+            "UPDATE work_items SET status = 'queued', lease_expires = NULL, attempts = MAX(attempts - 1, 0), "
+            "updated_at = ? WHERE worker = ? AND status = 'leased'",
+            (datetime.now().isoformat(), worker_id)
+        ).rowcount
+
+
+def work_outstanding(kinds: tuple) -> bool:
+    """Whether items of these kinds are queued or leased (or generation that will queue evaluations is)."""
+    watched = set(kinds) | ({"generate"} if "evaluate" in kinds else set())
+    conn = get_store()
+    with _store_lock:
+        return conn.execute(
+            f"SELECT 1 FROM work_items WHERE status IN ('queued', 'leased') "
+            f"AND kind IN ({', '.join('?' * len(watched))}) LIMIT 1", tuple(watched)
+        ).fetchone() is not None
+
+
+class Lease:
+    """A worker's claim on one work item, renewed every third of its length until released.
+
+    Used as a context manager around the work. renew() is also called on every Sparlo poll,
+    saving the report id with the item so a worker that takes it over after a crash
+    reattaches to the running report. Once the lease is lost, renew() raises LeaseLost.
+    """
+
+    def __init__(self, item: dict, worker_id: str, seconds: float):
+        self.item = item
+        self.worker_id = worker_id
+        self.seconds = seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._keep, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _keep(self):
+        while not self._stop.wait(self.seconds / 3):
+            try:
+                self.renew()
+            except LeaseLost:
+                return
+
+    def renew(self, state: dict = None):
+        """Extend the lease, storing state with the item when given."""
+        if not self.lost:
+            conn = get_store()
+            with _store_lock, conn:
+                cur = conn.execute(
+                    "UPDATE work_items SET lease_expires = ?, state = COALESCE(?, state), updated_at = ? "
+                    "WHERE id = ? AND worker = ? AND status = 'leased'",
+                    (time.time() + self.seconds, json.dumps(state) if state else None, datetime.now().isoformat(),
+                     self.item['id'], self.worker_id)
+                )
+            self.lost = cur.rowcount != 1
+        if self.lost:
+            raise LeaseLost(f"work item {self.item['id']} is no longer leased to {self.worker_id}")
+
+
+def run_generate_item(item: dict, lease: Lease, stream: bool = False) -> str:
+    """Run a queued problem through Sparlo and Claude and store the result. Returns a short outcome.
+
+    Sparlo polling renews the lease and records the report, so a retry of this item
+    reattaches to it. The problem_id is fixed at enqueue time, so a result stored by an
+    attempt that died before finishing the item is not generated again.
+    """
+    problem_id = item['problem_id']
+    if result_exists(problem_id):
+        return "already stored"
+    p = json.loads(item['payload'])
+    metadata = problem_metadata(problem_id, p)
+    state = json.loads(item['state'] or "{}")
+    timeline = state.get("sparlo_timeline", [])
+
+    def heartbeat(report_id, started_at):
+        lease.renew({"sparlo_report_id": report_id, "sparlo_start": started_at, "sparlo_timeline": timeline})
+
+    sparlo_out, sparlo_status, sparlo_time, sparlo_data = run_sparlo(
+        p['problem'], problem_id, timeline, state.get("sparlo_report_id"), state.get("sparlo_start"), heartbeat)
+    claude_out, claude_status, claude_time, claude_timing = run_claude(p['problem'], problem_id, stream)
+    if claude_status == "complete":
+        save_claude_report(problem_id, p['problem'], metadata, claude_out, claude_time, claude_timing)
+
+    sparlo_start = state.get("sparlo_start") or time.time() - sparlo_time
+    row = {
+        **metadata,
+        "created_at": datetime.now().isoformat(),
+        "run_id": item['run_id'],
+        "problem_text": p['problem'],
+        "sparlo_output": sparlo_out,
+        "claude_output": claude_out,
+        "sparlo_status": sparlo_status,
+        "claude_status": claude_status,
+        "sparlo_time_sec": sparlo_time,
+        "claude_time_sec": claude_time,
+        "sparlo_step_seconds": json.dumps(step_seconds(timeline, sparlo_start))
+        if sparlo_status == "complete" and timeline else None,
+        "claude_ttft_sec": claude_timing.get("ttft_sec"),
+        "claude_tokens_per_sec": claude_timing.get("tokens_per_sec"),
+        **usage_columns("sparlo", sparlo_usage(sparlo_data)),
+        **usage_columns("claude", claude_timing.get("usage")),
+        "evaluated": "false"
+    }
+    insert_result(row)
+
+    if sparlo_status == "complete" and claude_status == "complete":
+        enqueue_work_items("evaluate", [(problem_id, item['run_id'], None)])
+        return "stored, evaluation queued"
+    return f"stored (Sparlo {sparlo_status}, Claude {claude_status})"
+
+
+def run_evaluate_item(item: dict) -> str:
+    """Judge a stored result and commit the evaluation. Returns a short outcome."""
+    rows = read_results("problem_id = ?", (item['problem_id'],))
+    if not rows:
+        raise ValueError("no stored result for this problem")
+    row = rows[0]
+    if row['evaluated'] == 'true':
+        return "already evaluated"
+    apply_evaluation(row, *evaluate_row(row))
+    commit_evaluation(row)
+    return f"winner {row['winner']} (Sparlo: {row['sparlo_total']}, Claude: {row['claude_total']})"
+
+
+def run_work_item(item: dict, worker_id: str, lease_sec: float, stream: bool = False) -> str:
+    """Run one leased item and record how it ended. Runs in a worker thread; returns the outcome."""
+    label = f"{item['kind']} {item['problem_id'][:8]}"
+    try:
+        with Lease(item, worker_id, lease_sec) as lease:
+            if item['kind'] == "generate":
+                outcome = run_generate_item(item, lease, stream)
+            else:
+                outcome = run_evaluate_item(item)
+    except LeaseLost:
+        click.echo(f"  STOPPED: {label} (lease released or taken over by another worker)")
+        return "lost"
+    except Exception as e:
+        failed = item['attempts'] >= WORK_MAX_ATTEMPTS
+        finish_work_item(item, worker_id, "failed" if failed else "queued", str(e))
+        click.echo(f"  ERROR: {label}: {e} ({'failed' if failed else 'requeued'})")
+        return "failed" if failed else "requeued"
+
+    if not finish_work_item(item, worker_id, "done"):
+        click.echo(f"  LEASE LOST: {label} finished after another worker took it over")
+        return "lost"
+    click.echo(f"  DONE: {label} - {outcome}")
+    return "done"
+
+
+@cli.command()
+@click.argument('problems_file', required=False, type=click.Path(exists=True))
+@click.option('--start', default=0, help='Start from problem index (0-based)')
+@click.option('--count', default=None, type=int, help='Number of problems to queue (default: all)')
+@click.option('--evaluate', 'evaluations', is_flag=True, help='Also queue every complete, unevaluated stored row')
+def enqueue(problems_file, start, count, evaluations):
+    """Add problems (and pending evaluations) to the shared work queue.
+
+    PROBLEMS_FILE is a JSON array or JSONL file in the 'batch' format. Each
+    problem becomes a generation item; 'worker' processes claim items under
+    leases and write results to this results.db. Finished generations queue
+    their own evaluation, so --evaluate is only needed for rows stored by
+    other commands.
+    """
+    import uuid
+
+    if not problems_file and not evaluations:
+        raise click.UsageError("Provide PROBLEMS_FILE and/or --evaluate")
+
+    if problems_file:
+        invalid = 0
+
+        def items():
+            nonlocal invalid
+            for line, p in iter_problem_records(problems_file, start, count):
+                errors = problem_errors(p)
+                if errors:
+                    click.echo(f"  SKIPPING line {line}: {'; '.join(errors)}")
+                    invalid += 1
+                    continue
+                yield (str(uuid.uuid4()), _trace["run_id"], json.dumps(p))
+
+        try:
+            added = enqueue_work_items("generate", items())
+        except ProblemFileError as e:
+            click.echo(f"ERROR: {problems_file}: {e} (nothing queued)")
+            sys.exit(1)
+        click.echo(f"Queued {added} problems from {problems_file} as {_trace['run_id']}"
+                   + (f" ({invalid} invalid records skipped)" if invalid else ""))
+
+    if evaluations:
+        rows = read_results("evaluated = 'false' AND sparlo_status = 'complete' AND claude_status = 'complete'",
+                            columns=["problem_id", "run_id"])
+        added = enqueue_work_items("evaluate", ((row['problem_id'], row['run_id'], None) for row in rows))
+        click.echo(f"Queued {added} evaluations ({len(rows) - added} already queued)")
+
+    click.echo("Start workers with 'python benchmark.py worker' (any number, each with --slots N).")
+
+
+def default_worker_id() -> str:
+    """host-pid, naming this worker on the items it leases."""
+    import socket
+
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+@cli.command()
+@click.option('--kind', 'kinds', type=click.Choice(WORK_KINDS), multiple=True,
+              help='Kind of work to take (repeatable, default: all)')
+@click.option('--slots', default=1, type=click.IntRange(1), help='Items this worker runs at once')
+@click.option('--lease-minutes', default=WORK_LEASE_SEC / 60, type=click.FloatRange(0, min_open=True),
+              help='Lease length; an item not renewed for this long is taken over by another worker')
+@click.option('--max-items', default=None, type=click.IntRange(1), help='Exit after claiming this many items')
+@click.option('--wait', 'keep_waiting', is_flag=True, help='Keep waiting for new work when the queue is empty')
+@click.option('--worker-id', default=default_worker_id,
+              help='Name recorded on leased items (default: host-pid)')
+@click.option('--stream', is_flag=True, help='Stream Claude responses, recording time to first token')
+def worker(kinds, slots, lease_minutes, max_items, keep_waiting, worker_id, stream):
+    """Claim and run work items from the shared queue (see 'enqueue').
+
+    Each claimed item is leased to this worker and the lease is renewed while
+    the work runs (and on every Sparlo poll). If a worker dies, its items are
+    claimed again once their leases expire; a generation item reattaches to
+    its running Sparlo report. An item that errors is retried up to
+    WORK_MAX_ATTEMPTS claims before it is marked failed.
+
+    Without --wait, the worker exits once nothing it can take is queued or
+    leased. Ctrl-C returns this worker's items to the queue.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    kinds = kinds or WORK_KINDS
+    lease_sec = lease_minutes * 60
+    configure_clients(slots)
+    click.echo(f"Worker {worker_id}: {', '.join(kinds)} work, {slots} at a time, {lease_minutes:g} min leases")
+
+    executor = ThreadPoolExecutor(max_workers=slots)
+    running = set()
+    claimed = 0
+    outcomes = {}
+    try:
+        while True:
+            while len(running) < slots and (not max_items or claimed < max_items):
+                item = claim_work_item(worker_id, kinds, lease_sec)
+                if not item:
+                    break
+                claimed += 1
+                resumed = " (reattaching)" if item['state'] else ""
+                click.echo(f"  CLAIMED: {item['kind']} {item['problem_id'][:8]}, attempt {item['attempts']}{resumed}")
+                running.add(executor.submit(run_work_item, item, worker_id, lease_sec, stream))
+
+            if running:
+                done, running = wait(running, timeout=WORK_IDLE_POLL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    outcome = future.result()
+                    outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                continue
+            if max_items and claimed >= max_items:
+                break
+            if not keep_waiting and not work_outstanding(kinds):
+                break
+            time.sleep(WORK_IDLE_POLL)
+    except KeyboardInterrupt:
+        executor.shutdown(wait=False, cancel_futures=True)
+        released = release_work_items(worker_id)
+        click.echo(f"\nInterrupted: {released} items returned to the queue. Running items stop at their next poll.")
+        sys.exit(130)
+    executor.shutdown()
+
+    summary = ", ".join(f"{n} {outcome}" for outcome, n in sorted(outcomes.items()))
+    click.echo(f"\nWorker {worker_id} finished: {claimed} items claimed" + (f" ({summary})" if summary else ""))
+    echo_client_stats()
+    echo_cache_stats()
+
+
+@cli.command('queue')
+@click.option('--retry-failed', is_flag=True, help='Put failed items back in the queue')
+def queue_status(retry_failed):
+    """Show the shared work queue: items by kind and status, live leases and failures."""
+    conn = get_store()
+    if retry_failed:
+        with _store_lock, conn:
+            retried = conn.execute(
+                "UPDATE work_items SET status = 'queued', attempts = 0, worker = NULL, updated_at = ? "
+                "WHERE status = 'failed'", (datetime.now().isoformat(),)
+            ).rowcount
+        click.echo(f"Requeued {retried} failed items")
+
+    with _store_lock:
+        counts = conn.execute("SELECT kind, status, COUNT(*) FROM work_items GROUP BY kind, status").fetchall()
+        leases = conn.execute(
+            "SELECT kind, problem_id, worker, lease_expires, attempts FROM work_items "
+            "WHERE status = 'leased' ORDER BY lease_expires"
+        ).fetchall()
+        failed = conn.execute(
+            "SELECT kind, problem_id, attempts, error FROM work_items WHERE status = 'failed' ORDER BY id LIMIT 10"
+        ).fetchall()
+    if not counts:
+        click.echo("Work queue is empty. Add problems with 'benchmark enqueue'.")
+        return
+
+    table = {}
+    for kind, status, n in counts:
+        table.setdefault(kind, {})[status] = n
+    statuses = ("queued", "leased", "done", "failed")
+    click.echo(f"{'kind':<10}" + "".join(f"{status:>9}" for status in statuses))
+    for kind, row in sorted(table.items()):
+        click.echo(f"{kind:<10}" + "".join(f"{row.get(status, 0):>9}" for status in statuses))
+
+    if leases:
+        now = time.time()
+        click.echo(f"\nLeases ({len(leases)}):")
+        for kind, problem_id, worker_id, expires, attempts in leases:
+            left = expires - now
+            click.echo(f"  {kind:<9} {problem_id[:8]}  {worker_id:<28} "
+                       + (f"expires in {left / 60:.1f} min" if left > 0 else f"EXPIRED {-left / 60:.1f} min ago")
+                       + f"  (attempt {attempts})")
+    if failed:
+        click.echo("\nFailed (first 10; requeue with --retry-failed):")
+        for kind, problem_id, attempts, error in failed:
+            click.echo(f"  {kind:<9} {problem_id[:8]}  after {attempts} attempts: {(error or '')[:80]}")
+
+
+if __name__ == '__main__':
+    cli()